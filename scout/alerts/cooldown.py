@@ -0,0 +1,88 @@
+"""Alert cooldown — bounded dedup of repeat alerts, with repeat counts.
+
+Alerts are identified by a fingerprint: the caller's key when there is
+one, otherwise the message with URLs, hashes and numbers stripped, so an
+error whose text embeds a changing port, timestamp or commit still maps
+to one entry. Repeats inside the cooldown are counted rather than
+dropped; the count is appended to the next alert for that fingerprint,
+or sent as a summary when the cooldown runs out.
+
+Entries live in an OrderedDict in LRU order and are capped at
+max_entries; expired entries are swept, so memory stays flat no matter
+how many distinct alerts the daemon sees over its lifetime.
+"""
+
+import hashlib
+import logging
+import re
+from collections import OrderedDict
+
+log = logging.getLogger("scout.alerts.cooldown")
+
+_URL = re.compile(r"\w+://\S+")
+_HASH = re.compile(r"\b(?:0x[0-9a-f]+|[0-9a-f]{7,})\b", re.IGNORECASE)
+_DIGITS = re.compile(r"\d+")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(message: str, key: str | None = None) -> str:
+    if key:
+        return key
+    text = _URL.sub("<url>", message)
+    text = _HASH.sub("<hash>", text)
+    text = _DIGITS.sub("#", text)
+    text = _SPACE.sub(" ", text).strip().lower()
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+
+class CooldownEntry:
+    __slots__ = ("last_sent", "suppressed", "key", "sample")
+
+    def __init__(self, now: float, key: str | None, sample: str):
+        self.last_sent = now
+        self.suppressed = 0
+        self.key = key
+        self.sample = sample
+
+
+class CooldownStore:
+    def __init__(self, ttl: float, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, CooldownEntry] = OrderedDict()
+        self.suppressed_total = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def check(self, fp: str, message: str, now: float,
+              key: str | None = None) -> tuple[bool, int]:
+        """(allowed, repeats suppressed since the last alert with this fingerprint)."""
+        entry = self._entries.get(fp)
+        if entry is not None and now - entry.last_sent < self.ttl:
+            entry.suppressed += 1
+            entry.sample = message
+            self.suppressed_total += 1
+            self._entries.move_to_end(fp)
+            return False, entry.suppressed
+
+        repeats = entry.suppressed if entry is not None else 0
+        self._entries[fp] = CooldownEntry(now, key, message)
+        self._entries.move_to_end(fp)
+        while len(self._entries) > self.max_entries:
+            old_fp, old = self._entries.popitem(last=False)
+            if old.suppressed:
+                log.debug("cooldown store full — lost %d repeats of %s", old.suppressed, old_fp)
+        return True, repeats
+
+    def expire(self, now: float) -> list[CooldownEntry]:
+        """Drop entries whose cooldown ran out; return those that had repeats."""
+        expired = [
+            fp for fp, entry in self._entries.items() if now - entry.last_sent >= self.ttl
+        ]
+        repeated = []
+        for fp in expired:
+            entry = self._entries.pop(fp)
+            if entry.suppressed:
+                repeated.append(entry)
+        return repeated
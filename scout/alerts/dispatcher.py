@@ -0,0 +1,144 @@
+"""Alert dispatcher — one send() for every component, fanned out to all sinks.
+
+The dispatcher applies the cooldown once (see cooldown.py), then hands
+the alert to every configured sink without waiting. Each sink has its
+own queue, worker, timeout and error handling, so a hung webhook can't
+hold up Telegram or the local log file.
+
+Telegram is enabled whenever the telegram section has a bot token and
+chat id; additional sinks are listed under alerts.sinks.
+"""
+
+import asyncio
+import html
+import logging
+import time
+from pathlib import Path
+
+from scout.alerts.cooldown import CooldownStore, fingerprint
+from scout.alerts.sinks import SINK_TYPES, FileSink, QueuedSink, WebhookSink, plain_text
+from scout.alerts.telegram import TelegramAlerter
+from scout.http_client import HttpClient
+from scout.storage import data_dir
+
+log = logging.getLogger("scout.alerts.dispatcher")
+
+
+def build_sinks(config: dict, http: HttpClient | None = None,
+                state_dir: Path | None = None) -> list[QueuedSink]:
+    sinks: list[QueuedSink] = []
+    telegram = TelegramAlerter(config.get("telegram", {}), http=http, state_dir=state_dir)
+    if telegram.configured:
+        sinks.append(telegram)
+
+    for i, cfg in enumerate(config.get("alerts", {}).get("sinks", [])):
+        kind = cfg.get("type")
+        cls = SINK_TYPES.get(kind)
+        if cls is None:
+            log.error("alert sink %d: unknown type %r — expected one of %s",
+                      i, kind, tuple(SINK_TYPES))
+            continue
+        try:
+            if cls is WebhookSink:
+                sink = cls(cfg, http=http)
+            elif cls is FileSink:
+                sink = cls(cfg, default_dir=state_dir or data_dir(config, "alerts"))
+            else:
+                sink = cls(cfg)
+        except (KeyError, ValueError) as e:
+            log.error("alert sink %d (%s) disabled — bad config: %s", i, kind, e)
+            continue
+        if any(s.name == sink.name for s in sinks):
+            sink.name = f"{sink.name}-{i}"
+        sinks.append(sink)
+    return sinks
+
+
+class AlertDispatcher:
+    def __init__(self, config: dict, http: HttpClient | None = None,
+                 state_dir: Path | None = None):
+        alerts_cfg = config.get("alerts", {})
+        telegram_cfg = config.get("telegram", {})
+        self.cooldown = alerts_cfg.get("cooldown", telegram_cfg.get("alert_cooldown", 300))
+        self._cooldown = CooldownStore(
+            self.cooldown,
+            alerts_cfg.get("cooldown_entries", telegram_cfg.get("cooldown_entries", 1024)),
+        )
+        self._recent_alerts: list[dict] = []  # last 10 alerts for dashboard
+        self.sinks = build_sinks(config, http=http, state_dir=state_dir)
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.sinks)
+
+    @property
+    def recent_alerts(self) -> list[dict]:
+        return list(self._recent_alerts)
+
+    @property
+    def stats(self) -> dict:
+        sinks = {s.name: s.stats for s in self.sinks}
+        return {
+            "queue_depth": sum(s["queue_depth"] for s in sinks.values()),
+            "suppressed": self._cooldown.suppressed_total,
+            "cooldown_entries": len(self._cooldown),
+            "sinks": sinks,
+        }
+
+    async def send(self, message: str, key: str | None = None, force: bool = False):
+        """Queue an alert on every sink and return immediately.
+
+        force skips the cooldown — for messages someone explicitly asked for.
+        """
+        if not self.sinks:
+            log.warning("no alert sinks configured — alert dropped: %s", message)
+            return
+
+        now = time.time()
+        if force:
+            self._dispatch(now, message, key)
+            return
+        fp = fingerprint(message, key)
+        allowed, repeats = self._cooldown.check(fp, message, now, key)
+        if not allowed:
+            log.debug("alert suppressed (cooldown, %d repeats): %s", repeats, fp)
+            return
+        if repeats:
+            message += f"\n<i>🔁 {repeats} repeats suppressed since the last alert</i>"
+        self._dispatch(now, message, key)
+
+    def _dispatch(self, now: float, message: str, key: str | None):
+        self._recent_alerts.append({"ts": now, "message": message})
+        self._recent_alerts = self._recent_alerts[-10:]
+        for sink in self.sinks:
+            sink.enqueue(now, message, key)
+
+    async def run(self, stop: asyncio.Event):
+        if not self.sinks:
+            log.info("no alert sinks configured")
+            await stop.wait()
+            return
+        log.info("alert dispatcher started — sinks: %s", ", ".join(s.name for s in self.sinks))
+        await asyncio.gather(
+            self._sweep(stop),
+            *(sink.run(stop) for sink in self.sinks),
+        )
+
+    async def _sweep(self, stop: asyncio.Event):
+        """Report repeats whose cooldown ran out with no new alert to carry them."""
+        while not stop.is_set():
+            now = time.time()
+            minutes = max(1, round(self.cooldown / 60))
+            for entry in self._cooldown.expire(now):
+                # Strip markup before cutting so no tag or entity is left half-open
+                sample = html.escape(plain_text(entry.sample)[:500])
+                self._dispatch(now, (
+                    f"🔁 Repeated {entry.suppressed}× in the last {minutes} min:\n{sample}"
+                ), None)
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                pass
+
+    async def drain(self):
+        await asyncio.gather(*(sink.drain() for sink in self.sinks))
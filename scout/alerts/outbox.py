@@ -0,0 +1,151 @@
+"""Alert outbox — undelivered alerts kept on disk until they can be sent.
+
+The outbox is an append-only JSON-lines file. Each alert is one line with
+an increasing id; a delivered alert is marked by appending {"ack": id}.
+Every append is fsynced, and a torn last line from a crash is skipped on
+load, so nothing already written is lost or sent twice by replay.
+
+Compaction rewrites the file atomically with only the pending alerts,
+dropping stale ones on the way: an older alert with the same key, and a
+down / slow alert once the same target has a later recovered alert. If
+the outbox is still over max_entries, the oldest alerts are dropped.
+
+All methods do blocking file I/O — call them via asyncio.to_thread.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+
+from scout.storage import atomic_write
+
+log = logging.getLogger("scout.alerts.outbox")
+
+# Alert kind → earlier kinds (same key prefix) it makes obsolete
+SUPERSEDES = {"recovered": ("down", "slow")}
+
+
+def split_key(key: str) -> tuple[str, str]:
+    """Split "<scope>:<name>:<kind>[:<sub>]" into ("<scope>:<name>", kind).
+
+    Slow alerts carry the phase after the kind (gateway:x:slow:ttfb), so
+    the kind is the third field rather than the last one.
+    """
+    parts = key.split(":", 3)
+    if len(parts) < 3:
+        prefix, _, kind = key.rpartition(":")
+        return prefix, kind
+    return f"{parts[0]}:{parts[1]}", parts[2]
+
+
+class AlertOutbox:
+    def __init__(self, path: Path, max_entries: int = 200):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._pending: dict[int, dict] = {}
+        self._next_id = 1
+        self._lines = 0
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        torn = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    torn += 1
+                    continue
+                self._lines += 1
+                if "ack" in rec:
+                    self._pending.pop(rec["ack"], None)
+                else:
+                    self._pending[rec["id"]] = rec
+                    self._next_id = max(self._next_id, rec["id"] + 1)
+        if torn:
+            log.warning("outbox: skipped %d unreadable lines", torn)
+        if self._pending:
+            log.info("outbox: %d undelivered alerts from previous run", len(self._pending))
+        if torn or self._lines > len(self._pending):
+            self.compact()
+
+    def _write(self, records: list[dict]):
+        data = b"".join(json.dumps(r, ensure_ascii=False).encode() + b"\n" for r in records)
+        with open(self.path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self._lines += len(records)
+
+    def append(self, alerts: list[dict]):
+        """Persist alerts ({ts, message, key}) for later delivery."""
+        records = []
+        for alert in alerts:
+            records.append({"id": self._next_id, **alert})
+            self._next_id += 1
+        self._write(records)
+        for rec in records:
+            self._pending[rec["id"]] = rec
+        if len(self._pending) > self.max_entries:
+            self.compact()
+
+    def ack(self, ids: list[int]):
+        ids = [i for i in ids if i in self._pending]
+        if not ids:
+            return
+        self._write([{"ack": i} for i in ids])
+        for i in ids:
+            del self._pending[i]
+        # Once drained, or mostly acks, rewrite so the file doesn't grow forever
+        if not self._pending or self._lines > 2 * len(self._pending) + 64:
+            self.compact()
+
+    def pending(self, limit: int | None = None) -> list[dict]:
+        """Undelivered alerts, oldest first."""
+        records = list(self._pending.values())
+        return records if limit is None else records[:limit]
+
+    def compact(self):
+        stale = self._stale()
+        for i in stale:
+            del self._pending[i]
+        overflow = len(self._pending) - self.max_entries
+        if not stale and overflow <= 0 and self._lines == len(self._pending):
+            return
+        if overflow > 0:
+            for i in list(self._pending)[:overflow]:
+                del self._pending[i]
+            log.warning("outbox full — dropped %d oldest alerts", overflow)
+        data = b"".join(
+            json.dumps(r, ensure_ascii=False).encode() + b"\n" for r in self._pending.values()
+        )
+        atomic_write(self.path, data)
+        self._lines = len(self._pending)
+        if stale:
+            log.info("outbox: compacted %d superseded alerts", len(stale))
+
+    def _stale(self) -> set[int]:
+        newest: dict[str, int] = {}
+        for i, rec in self._pending.items():
+            if rec.get("key"):
+                newest[rec["key"]] = i
+        stale = set()
+        for i, rec in self._pending.items():
+            key = rec.get("key")
+            if not key:
+                continue
+            if newest[key] != i:
+                stale.add(i)
+                continue
+            prefix, kind = split_key(key)
+            for later_kind, kinds in SUPERSEDES.items():
+                later = newest.get(f"{prefix}:{later_kind}")
+                if kind in kinds and later is not None and later > i:
+                    stale.add(i)
+        return stale
@@ -0,0 +1,33 @@
+"""Token bucket — paces outbound alert sends."""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate            # tokens per second
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            wait = max(self._updated - now, 0) + (1 - self._tokens) / self.rate
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Empty the bucket and hold refills for `seconds` (server said slow down)."""
+        self._tokens = 0.0
+        self._updated = max(self._updated, time.monotonic() + seconds)
@@ -0,0 +1,278 @@
+"""Alert sinks — where dispatched alerts end up.
+
+Every sink owns a bounded queue and a worker task, so a slow or failing
+sink only ever delays itself. Each delivery is bounded by the sink's
+timeout and any error is counted and logged, never raised to the
+dispatcher.
+
+    webhook  POST a JSON batch of alerts to a URL
+    syslog   one datagram per alert to /dev/log or a remote host:port
+    file     append JSON lines to a local file (rotated at max_bytes)
+
+The Telegram sink lives in telegram.py; it adds coalescing, rate limiting
+and the on-disk outbox on top of QueuedSink.
+"""
+
+import asyncio
+import html
+import json
+import logging
+import os
+import re
+import socket
+import time
+from collections import deque
+from logging.handlers import SysLogHandler
+from pathlib import Path
+
+import aiohttp
+
+from scout.http_client import HttpClient
+from scout.storage import ROOT
+
+log = logging.getLogger("scout.alerts.sinks")
+
+# Delivery outcomes
+SENT = "sent"
+REJECTED = "rejected"         # the receiver refused it — retrying won't help
+UNDELIVERED = "undelivered"   # network error, 5xx, timeout
+
+_TAG = re.compile(r"<[^>]+>")
+
+
+def plain_text(message: str) -> str:
+    """Alert text without Telegram HTML markup."""
+    return html.unescape(_TAG.sub("", message))
+
+
+def _summary(samples: deque) -> dict:
+    if not samples:
+        return {"count": 0, "p50": None, "max": None}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "p50": round(ordered[len(ordered) // 2], 1),
+        "max": round(ordered[-1], 1),
+    }
+
+
+class QueuedSink:
+    """Bounded queue plus one worker; subclasses implement _deliver()."""
+
+    type = "sink"
+
+    def __init__(self, config: dict):
+        self.name = config.get("name", self.type)
+        self.timeout = config.get("timeout", 10)
+        self.coalesce_window = config.get("coalesce_window", 0)
+        self.max_batch = config.get("max_batch", 20)
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=config.get("queue_size", 100))
+        self._send_ms: deque[float] = deque(maxlen=100)
+        self._queued_ms: deque[float] = deque(maxlen=100)
+        self._sent = 0
+        self._dropped = 0
+        self._failed = 0
+
+    @property
+    def configured(self) -> bool:
+        return True
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "sent": self._sent,
+            "dropped": self._dropped,
+            "failed": self._failed,
+            "send_latency_ms": _summary(self._send_ms),
+            "queue_delay_ms": _summary(self._queued_ms),
+        }
+
+    def enqueue(self, ts: float, message: str, key: str | None = None):
+        """Queue an alert and return immediately."""
+        if self._queue.full():
+            # Newest alerts matter most — make room by dropping the oldest
+            old = self._queue.get_nowait()
+            self._dropped += 1
+            log.warning("%s queue full — dropped: %s", self.name, old[2][:80])
+        self._queue.put_nowait((time.monotonic(), ts, message, key))
+
+    async def run(self, stop: asyncio.Event):
+        while not stop.is_set():
+            await self._tick()
+            try:
+                first = await asyncio.wait_for(self._queue.get(), timeout=1.0)
+            except asyncio.TimeoutError:
+                continue
+            await self._send_batch(await self._collect(first))
+        await self.drain()
+
+    async def _tick(self):
+        """Hook run about once a second by the worker loop."""
+
+    async def drain(self):
+        """Send everything still queued without waiting for stragglers."""
+        while not self._queue.empty():
+            batch = [self._queue.get_nowait()
+                     for _ in range(min(self.max_batch, self._queue.qsize()))]
+            await self._send_batch(batch)
+
+    async def _collect(self, first: tuple) -> list[tuple]:
+        batch = [first]
+        deadline = time.monotonic() + self.coalesce_window
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _send_batch(self, batch: list[tuple]):
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(self._deliver(batch), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            log.error("%s sink timed out after %ss", self.name, self.timeout)
+            result = UNDELIVERED
+        except Exception as e:
+            log.error("%s sink error: %s", self.name, e)
+            result = UNDELIVERED
+        self._send_ms.append((time.perf_counter() - started) * 1000)
+        self._record(batch, result)
+
+    def _record(self, items: list[tuple], result: str):
+        if result != SENT:
+            self._failed += len(items)
+            return
+        self._sent += len(items)
+        done = time.monotonic()
+        for enqueued, *_ in items:
+            self._queued_ms.append((done - enqueued) * 1000)
+
+    async def _deliver(self, items: list[tuple]) -> str:
+        raise NotImplementedError
+
+
+class WebhookSink(QueuedSink):
+    type = "webhook"
+
+    def __init__(self, config: dict, http: HttpClient | None = None):
+        super().__init__(config)
+        self.url = config["url"]
+        self.headers = config.get("headers", {})
+        self.http = http or HttpClient()
+        self._host = socket.gethostname()
+
+    async def _deliver(self, items: list[tuple]) -> str:
+        payload = {
+            "source": "clawpi-scout",
+            "host": self._host,
+            "alerts": [
+                {"ts": ts, "key": key, "message": message, "text": plain_text(message)}
+                for _, ts, message, key in items
+            ],
+        }
+        async with self.http.post(
+            self.url,
+            json=payload,
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        ) as resp:
+            await resp.read()
+            if 200 <= resp.status < 300:
+                return SENT
+            log.error("webhook %s failed (%d)", self.name, resp.status)
+            return UNDELIVERED if resp.status >= 500 or resp.status == 429 else REJECTED
+
+
+class SyslogSink(QueuedSink):
+    type = "syslog"
+
+    def __init__(self, config: dict):
+        super().__init__(config)
+        self.address = config.get("address", "/dev/log")
+        self.ident = config.get("ident", "clawpi-scout")
+        facility = config.get("facility", "user")
+        if facility not in SysLogHandler.facility_names:
+            raise ValueError(f"unknown syslog facility {facility!r}")
+        self.facility = SysLogHandler.facility_names[facility]
+        self._sock: socket.socket | None = None
+
+    def _connect(self) -> socket.socket:
+        if self.address.startswith("/"):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            target = self.address
+        else:
+            host, _, port = self.address.rpartition(":")
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            target = (host, int(port or 514))
+        try:
+            sock.connect(target)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    @staticmethod
+    def _severity(key: str | None) -> int:
+        kind = (key or "").rpartition(":")[2]
+        if kind in ("down", "error"):
+            return SysLogHandler.LOG_ERR
+        if kind == "recovered":
+            return SysLogHandler.LOG_INFO
+        return SysLogHandler.LOG_WARNING
+
+    def _send(self, items: list[tuple]):
+        if self._sock is None:
+            self._sock = self._connect()
+        try:
+            for _, _, message, key in items:
+                pri = self.facility * 8 + self._severity(key)
+                line = " | ".join(plain_text(message).splitlines())
+                self._sock.send(f"<{pri}>{self.ident}: {line}".encode()[:2048])
+        except OSError:
+            self._sock.close()
+            self._sock = None
+            raise
+
+    async def _deliver(self, items: list[tuple]) -> str:
+        await asyncio.to_thread(self._send, items)
+        return SENT
+
+
+class FileSink(QueuedSink):
+    type = "file"
+
+    def __init__(self, config: dict, default_dir: Path):
+        super().__init__(config)
+        path = Path(config.get("path", default_dir / "alerts.jsonl"))
+        self.path = path if path.is_absolute() else ROOT / path
+        self.max_bytes = config.get("max_bytes", 5 * 1024 * 1024)
+
+    def _append(self, items: list[tuple]):
+        data = "".join(
+            json.dumps({"ts": ts, "key": key, "message": message, "text": plain_text(message)},
+                       ensure_ascii=False) + "\n"
+            for _, ts, message, key in items
+        )
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            if self.path.stat().st_size + len(data) > self.max_bytes:
+                os.replace(self.path, self.path.with_name(self.path.name + ".1"))
+        except FileNotFoundError:
+            pass
+        with open(self.path, "a") as f:
+            f.write(data)
+
+    async def _deliver(self, items: list[tuple]) -> str:
+        await asyncio.to_thread(self._append, items)
+        return SENT
+
+
+SINK_TYPES = {cls.type: cls for cls in (WebhookSink, SyslogSink, FileSink)}
@@ -1,54 +1,205 @@
-"""Telegram alerter — sends messages directly via Telegram Bot API."""
+"""Telegram alerter — sends messages directly via Telegram Bot API.
 
+A QueuedSink: the dispatcher enqueues and returns, the sink's worker
+sends. Alerts that arrive within coalesce_window of each other go out as
+one message (split only if it would exceed Telegram's length limit),
+sends are paced by a token bucket, and a 429 pauses the bucket for the
+retry_after Telegram asks for.
+
+Alerts that can't be delivered (network down, Telegram 5xx) go to the
+on-disk outbox instead of being dropped, and are replayed in order with
+exponential backoff. While the outbox is non-empty new alerts are
+appended behind it, so nothing overtakes an older alert.
+"""
+
+import asyncio
 import logging
 import time
+from pathlib import Path
 
 import aiohttp
 
+from scout.alerts.outbox import AlertOutbox
+from scout.alerts.ratelimit import TokenBucket
+from scout.alerts.sinks import REJECTED, SENT, UNDELIVERED, QueuedSink
+from scout.http_client import HttpClient
+
 log = logging.getLogger("scout.alerts")
 
+PREFIX = "🔍 clawpi-scout\n\n"
+MAX_TEXT = 4096 - len(PREFIX) - 64   # headroom for the batch header
 
-class TelegramAlerter:
-    def __init__(self, config: dict):
+
+class TelegramAlerter(QueuedSink):
+    type = "telegram"
+
+    def __init__(self, config: dict, http: HttpClient | None = None,
+                 state_dir: Path | None = None):
+        super().__init__({"coalesce_window": 2.0, **config})
         self.bot_token = config.get("bot_token", "")
         self.chat_id = config.get("chat_id", "")
-        self.cooldown = config.get("alert_cooldown", 300)
-        self._last_sent: dict[str, float] = {}
-        self._recent_alerts: list[dict] = []  # last 10 alerts for dashboard
+        self.max_retries = config.get("max_retries", 3)
+        self.http = http or HttpClient()
+
+        self._bucket = TokenBucket(
+            rate=config.get("rate_per_minute", 20) / 60,
+            burst=config.get("burst", 3),
+        )
+        self._coalesced = 0
+        self._rate_limited = 0
+
+        self._outbox = None
+        if state_dir is not None:
+            self._outbox = AlertOutbox(
+                Path(state_dir) / "outbox.jsonl", config.get("outbox_size", 200)
+            )
+        self.retry_base = config.get("outbox_retry", 5)
+        self.retry_max = config.get("outbox_retry_max", 300)
+        self._retry_delay = self.retry_base
+        self._retry_at = 0.0
 
     @property
     def configured(self) -> bool:
         return bool(self.bot_token and self.chat_id)
 
-    async def send(self, message: str, key: str | None = None):
-        if not self.configured:
-            log.warning("telegram not configured — alert dropped: %s", message)
-            return
+    @property
+    def stats(self) -> dict:
+        return {
+            **super().stats,
+            "coalesced": self._coalesced,
+            "rate_limited": self._rate_limited,
+            "outbox": len(self._outbox) if self._outbox is not None else 0,
+        }
+
+    async def run(self, stop: asyncio.Event):
+        log.info("telegram sender started — %.0f msgs/min, burst %d",
+                 self._bucket.rate * 60, self._bucket.burst)
+        await super().run(stop)
+        # Whatever couldn't go out was kept in the outbox for next start
+
+    async def _tick(self):
+        if self._outbox and time.monotonic() >= self._retry_at:
+            await self._replay()
 
-        now = time.time()
-        cooldown_key = key or message[:50]
-        last = self._last_sent.get(cooldown_key, 0)
-        if now - last < self.cooldown:
-            log.debug("alert suppressed (cooldown): %s", cooldown_key)
+    async def _send_batch(self, batch: list[tuple]):
+        if self._outbox:
+            # Older alerts are still waiting — keep the order
+            await self._to_outbox(batch)
             return
+        groups = _split(batch)
+        for n, items in enumerate(groups):
+            result = await self._send_group(items)
+            if result == UNDELIVERED and self._outbox is not None:
+                await self._to_outbox([i for group in groups[n:] for i in group])
+                self._schedule_retry()
+                return
+            if result != SENT:
+                self._failed += len(items)
 
+    async def _send_group(self, items: list[tuple]) -> str:
+        if len(items) == 1:
+            text = items[0][2]
+        else:
+            text = f"<b>{len(items)} alerts</b>\n\n" + "\n\n".join(i[2] for i in items)
+        result = await self._post(text)
+        if result == SENT:
+            self._coalesced += len(items) - 1
+            self._record(items, SENT)
+        return result
+
+    async def _to_outbox(self, items: list[tuple]):
+        alerts = [{"ts": ts, "message": message, "key": key} for _, ts, message, key in items]
+        try:
+            await asyncio.to_thread(self._outbox.append, alerts)
+            log.warning("%d alerts saved to outbox (%d pending)", len(alerts), len(self._outbox))
+        except OSError as e:
+            self._failed += len(alerts)
+            log.error("outbox write failed — %d alerts lost: %s", len(alerts), e)
+
+    async def _replay(self):
+        """Send outbox alerts oldest first until one fails or the outbox is empty."""
+        try:
+            await asyncio.to_thread(self._outbox.compact)
+            while self._outbox:
+                records = await asyncio.to_thread(self._outbox.pending, self.max_batch)
+                now, wall = time.monotonic(), time.time()
+                items = [
+                    # Queued when it was raised, not when it came back off disk
+                    (now - max(0.0, wall - r["ts"]), r["ts"], _delayed(r), r.get("key"), r["id"])
+                    for r in records
+                ]
+                for group in _split(items):
+                    result = await self._send_group([i[:4] for i in group])
+                    if result == UNDELIVERED:
+                        self._schedule_retry()
+                        return
+                    if result == REJECTED:
+                        self._failed += len(group)
+                    await asyncio.to_thread(self._outbox.ack, [i[4] for i in group])
+                self._retry_delay = self.retry_base
+                log.info("outbox replay: %d alerts delivered, %d pending",
+                         len(records), len(self._outbox))
+        except OSError as e:
+            # SD card trouble must not kill the worker — try again later
+            log.error("outbox replay failed: %s", e)
+            self._schedule_retry()
+
+    def _schedule_retry(self):
+        self._retry_at = time.monotonic() + self._retry_delay
+        log.info("alert delivery failing — next outbox retry in %ds", self._retry_delay)
+        self._retry_delay = min(self._retry_delay * 2, self.retry_max)
+
+    async def _post(self, text: str) -> str:
         url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
         payload = {
             "chat_id": self.chat_id,
-            "text": f"🔍 clawpi-scout\n\n{message}",
+            "text": PREFIX + text,
             "parse_mode": "HTML",
         }
 
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload) as resp:
+        for _ in range(self.max_retries):
+            await self._bucket.acquire()
+            started = time.perf_counter()
+            try:
+                async with self.http.post(
+                    url, json=payload, timeout=aiohttp.ClientTimeout(total=self.timeout)
+                ) as resp:
+                    if resp.status == 429:
+                        body = await resp.json(content_type=None)
+                        retry_after = body.get("parameters", {}).get("retry_after", 5)
+                        self._rate_limited += 1
+                        log.warning("telegram rate limited — retrying in %ss", retry_after)
+                        self._bucket.pause(retry_after)
+                        continue
+                    body = await resp.text()
+                    self._send_ms.append((time.perf_counter() - started) * 1000)
                     if resp.status == 200:
-                        log.info("telegram alert sent: %s", message[:80])
-                        self._last_sent[cooldown_key] = now
-                        self._recent_alerts.append({"ts": now, "message": message})
-                        self._recent_alerts = self._recent_alerts[-10:]
-                    else:
-                        body = await resp.text()
-                        log.error("telegram send failed (%d): %s", resp.status, body)
-        except Exception as e:
-            log.error("telegram send error: %s", e)
+                        log.info("telegram alert sent: %s", text[:80])
+                        return SENT
+                    log.error("telegram send failed (%d): %s", resp.status, body)
+                    return UNDELIVERED if resp.status >= 500 else REJECTED
+            except Exception as e:
+                log.error("telegram send error: %s", e)
+                return UNDELIVERED
+        log.error("telegram send gave up after %d rate-limited attempts", self.max_retries)
+        return UNDELIVERED
+
+
+def _delayed(record: dict) -> str:
+    raised = time.strftime("%H:%M:%S", time.localtime(record["ts"]))
+    return f"<i>⏳ Delayed — raised at {raised}</i>\n{record['message']}"
+
+
+def _split(batch: list[tuple]) -> list[list[tuple]]:
+    """Group queued alerts into runs that fit in one Telegram message."""
+    groups, size = [], 0
+    for item in batch:
+        length = len(item[2]) + 2
+        if groups and size + length <= MAX_TEXT:
+            groups[-1].append(item)
+            size += length
+        else:
+            groups.append([item])
+            size = length
+    return groups
+
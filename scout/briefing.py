@@ -1,116 +1,290 @@
-"""Morning briefing — sends a daily status summary to Telegram."""
+"""Morning briefing — sends a daily status summary to the configured alert sinks.
+
+Two ways in:
+
+    cron     `python -m scout.briefing` — loads the config, probes every
+             gateway, asks tailscale for the IP and reads the history files
+    daemon   Briefing — renders from the live HealthMonitor and
+             WatcherManager, the shared SystemSampler snapshot and a Tailscale IP /
+             availability figures refreshed in the background, so a button
+             press only formats a string and enqueues it
+"""
 
 import asyncio
 import logging
-import platform
-import shutil
 import time
 
 import aiohttp
 import yaml
 
-from scout.alerts.telegram import TelegramAlerter
+from scout.alerts.dispatcher import AlertDispatcher
+from scout.health.monitor import open_history, parse_targets
+from scout.http_client import HttpClient
+from scout.storage import data_dir
+from scout.system.sampler import SystemSampler
 
 CONFIG_PATH = __file__.replace("briefing.py", "../config/scout.yaml")
 
 log = logging.getLogger("scout.briefing")
 
 
-async def get_gateway_status(url: str, timeout: int = 10) -> tuple[bool, int]:
+async def get_gateway_status(
+    url: str, timeout: int = 10, http: HttpClient | None = None
+) -> tuple[bool, int]:
     """Check gateway and return (ok, status_code)."""
+    http = http or HttpClient()
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                url, timeout=aiohttp.ClientTimeout(total=timeout)
-            ) as resp:
-                return resp.status < 500, resp.status
+        async with http.get(
+            url, timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as resp:
+            await resp.read()
+            return resp.status < 500, resp.status
     except Exception:
         return False, 0
 
 
 async def get_tailscale_ip() -> str:
     """Get this device's Tailscale IP."""
-    proc = await asyncio.create_subprocess_exec(
-        "tailscale", "ip", "-4",
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "tailscale", "ip", "-4",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except OSError:
+        return "unknown"
     stdout, _ = await proc.communicate()
     return stdout.decode().strip() if proc.returncode == 0 else "unknown"
 
 
-def get_system_stats() -> dict:
-    """Collect basic system stats."""
-    disk = shutil.disk_usage("/")
-    with open("/proc/meminfo") as f:
-        mem = {}
-        for line in f:
-            parts = line.split()
-            if parts[0] in ("MemTotal:", "MemAvailable:"):
-                mem[parts[0].rstrip(":")] = int(parts[1]) // 1024  # MB
+async def get_system_stats(config: dict | None = None, rate_window: float = 1.0) -> dict:
+    """One-off system stats (cron mode — the daemon reads SystemSampler.snapshot).
 
-    with open("/proc/loadavg") as f:
-        load = f.read().split()[:3]
+    Rates are differences between two readings, so a second sample is
+    taken rate_window seconds after the sampler's priming one.
+    """
+    sampler = SystemSampler(config)
+    try:
+        await asyncio.sleep(rate_window)
+        sampler.sample()
+        return dict(sampler.snapshot)
+    finally:
+        sampler.close()
 
-    with open("/sys/class/thermal/thermal_zone0/temp") as f:
-        temp = int(f.read().strip()) / 1000
 
-    return {
-        "disk_used_pct": round(disk.used / disk.total * 100, 1),
-        "disk_free_gb": round(disk.free / (1024**3), 1),
-        "mem_total_mb": mem.get("MemTotal", 0),
-        "mem_available_mb": mem.get("MemAvailable", 0),
-        "load_avg": " / ".join(load),
-        "cpu_temp": temp,
-        "hostname": platform.node(),
-    }
+def format_latency(summary: dict) -> str:
+    """One-line p50/p95/p99/max rendering of a histogram summary."""
+    if not summary.get("count"):
+        return "no samples"
+    return (
+        f"p50 {summary['p50']:.0f} · p95 {summary['p95']:.0f} · "
+        f"p99 {summary['p99']:.0f} · max {summary['max']:.0f} ms"
+    )
 
 
-async def run_briefing():
-    """Generate and send the morning briefing."""
-    from pathlib import Path
+def format_availability(history) -> str:
+    """24h / 7d availability from a target's persisted probe history."""
+    parts = []
+    for label, window in (("24h", 86400), ("7d", 7 * 86400)):
+        pct = history.availability(window)["availability_pct"]
+        parts.append(f"{label} {pct:.2f}%" if pct is not None else f"{label} n/a")
+    return " · ".join(parts)
 
-    config_path = Path(__file__).parent.parent / "config" / "scout.yaml"
-    with open(config_path) as f:
-        config = yaml.safe_load(f)
 
-    alerter = TelegramAlerter(config.get("telegram", {}))
-    if not alerter.configured:
-        print("Telegram not configured — cannot send briefing")
-        return
+def format_rates(stats: dict) -> str:
+    """CPU and disk I/O lines, when the sampler has rates."""
+    lines = ""
+    cpu = stats.get("cpu")
+    if cpu:
+        cores = " / ".join(f"{c:.0f}" for c in cpu["cores_pct"])
+        lines += f"  ⚙️ CPU: {cpu['total_pct']:.0f}% (cores {cores}, iowait {cpu['iowait_pct']:.0f}%)\n"
+    for dev, io in (stats.get("disk_io") or {}).items():
+        lines += (
+            f"  💽 {dev}: r {io['read_kbps']:.0f} · w {io['write_kbps']:.0f} kB/s, "
+            f"{io['util_pct']:.0f}% busy\n"
+        )
+    return lines
 
-    gw_url = config.get("gateway", {}).get("url", "")
-    gw_ok, gw_status = await get_gateway_status(gw_url)
-    ts_ip = await get_tailscale_ip()
-    stats = get_system_stats()
 
-    gw_icon = "✅" if gw_ok else "🔴"
-    temp_icon = "🟢" if stats["cpu_temp"] < 60 else "🟡" if stats["cpu_temp"] < 75 else "🔴"
+def format_net(stats: dict) -> str:
+    lines = ""
+    for iface, rate in (stats.get("net") or {}).items():
+        lines += (
+            f"  📶 {iface}: ↓ {rate['rx_bps'] / 1024:.1f} · ↑ {rate['tx_bps'] / 1024:.1f} kB/s\n"
+        )
+    return lines
+
 
-    msg = (
+def format_briefing(stats: dict, gw_lines: str, ts_ip: str, watcher_line: str) -> str:
+    temp_icon = "🟢" if stats["cpu_temp"] < 60 else "🟡" if stats["cpu_temp"] < 75 else "🔴"
+    return (
         f"📋 <b>Morning Briefing — {stats['hostname']}</b>\n"
         f"\n"
         f"<b>Gateway</b>\n"
-        f"  {gw_icon} Status: {'Online' if gw_ok else 'OFFLINE'} ({gw_status})\n"
-        f"  🔗 {gw_url}\n"
+        f"{gw_lines}"
         f"\n"
         f"<b>System</b>\n"
         f"  {temp_icon} CPU temp: {stats['cpu_temp']}°C\n"
         f"  💾 Disk: {stats['disk_used_pct']}% used ({stats['disk_free_gb']} GB free)\n"
         f"  🧠 Memory: {stats['mem_available_mb']} MB free / {stats['mem_total_mb']} MB\n"
         f"  📊 Load: {stats['load_avg']}\n"
+        f"{format_rates(stats)}"
         f"\n"
         f"<b>Network</b>\n"
         f"  🌐 Tailscale: {ts_ip}\n"
+        f"{format_net(stats)}"
         f"\n"
         f"<b>Watchers</b>\n"
-        f"  👁️ {len(config.get('watchers', {}).get('targets', []))} targets configured\n"
+        f"  👁️ {watcher_line}\n"
     )
 
+
+class Briefing:
+    """Briefing rendered from the daemon's live state.
+
+    Nothing on the send path touches the network, a subprocess or the
+    history files: the Tailscale IP and availability figures are refreshed
+    by run() every tailscale_ttl / availability_ttl seconds, off the hot path.
+    """
+
+    def __init__(self, config: dict, alerter, health, watchers=None,
+                 system: SystemSampler | None = None):
+        cfg = config.get("briefing", {})
+        self.tailscale_ttl = cfg.get("tailscale_ttl", 300)
+        self.availability_ttl = cfg.get("availability_ttl", 300)
+        self.alerter = alerter
+        self.health = health
+        self.watchers = watchers
+        self.system = system or SystemSampler()
+        self.tailscale_ip = "unknown"
+        self._availability: dict[str, str] = {}
+
+    async def refresh_tailscale(self):
+        self.tailscale_ip = await get_tailscale_ip()
+
+    async def refresh_availability(self):
+        # Scanning a week of history takes a while on a Pi — keep it off the loop
+        for target in self.health.targets:
+            if target.history is not None:
+                self._availability[target.name] = await asyncio.to_thread(
+                    format_availability, target.history
+                )
+
+    async def run(self, stop: asyncio.Event):
+        next_ip = next_avail = 0.0
+        while not stop.is_set():
+            now = time.monotonic()
+            if now >= next_ip:
+                await self.refresh_tailscale()
+                next_ip = now + self.tailscale_ttl
+            if now >= next_avail:
+                await self.refresh_availability()
+                next_avail = now + self.availability_ttl
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=min(next_ip, next_avail) - now)
+            except asyncio.TimeoutError:
+                pass
+
+    def render(self) -> str:
+        targets = self.health.targets
+        gw_lines = ""
+        for t in targets:
+            name = f"{t.name}: " if len(targets) > 1 else "Status: "
+            if t.last_result is None:
+                gw_lines += f"  ⏳ {name}not checked yet\n"
+            else:
+                latency = f", {t.last_latency_ms:.0f} ms" if t.last_latency_ms is not None else ""
+                gw_icon = "🔴" if t.alerted else "✅" if t.last_result else "🟡"
+                state = "OFFLINE" if t.alerted else "Online" if t.last_result else "Failing"
+                gw_lines += f"  {gw_icon} {name}{state} (last ok {t.format_last_ok()}{latency})\n"
+            gw_lines += f"  🔗 {t.url}\n"
+            gw_lines += f"  📈 Availability: {self._availability.get(t.name, 'n/a')}\n"
+        gw_lines += f"  ⏱️ Latency 24h: {format_latency(self.health.latency.summary('24h'))}\n"
+
+        if self.watchers is not None:
+            day_ago = time.time() - 86400
+            states = self.watchers.target_states()
+            changed = sum(1 for w in states if (w["last_change"] or 0) >= day_ago)
+            failing = sum(1 for w in states if w["error_streak"])
+            watcher_line = f"{len(states)} targets · {changed} changed in 24h · {failing} failing"
+        else:
+            watcher_line = "none configured"
+
+        return format_briefing(self.system.snapshot, gw_lines, self.tailscale_ip, watcher_line)
+
+    async def send(self):
+        started = time.perf_counter()
+        # A button press always gets an answer — no cooldown, no repeat summary
+        await self.alerter.send(self.render(), key="briefing", force=True)
+        log.info("briefing queued in %.1f ms", (time.perf_counter() - started) * 1000)
+
+
+async def run_briefing():
+    """Generate and send the morning briefing (cron mode)."""
+    from pathlib import Path
+
+    config_path = Path(__file__).parent.parent / "config" / "scout.yaml"
+    with open(config_path) as f:
+        config = yaml.safe_load(f)
+
+    http = HttpClient(config.get("http", {}))
+    try:
+        await _send_briefing(config, http)
+    finally:
+        await http.close()
+
+
+async def _send_briefing(config: dict, http: HttpClient):
+    alerter = AlertDispatcher(config, http=http)
+    if not alerter.configured:
+        print("No alert sinks configured — cannot send briefing")
+        return
+
+    targets = parse_targets(config.get("gateway", {}))
+    # The rate window runs while the gateways are probed
+    stats_task = asyncio.create_task(get_system_stats(config.get("system", {})))
+    results = await asyncio.gather(*(
+        get_gateway_status(t.url, timeout=t.timeout, http=http) for t in targets
+    ))
+    ts_ip = await get_tailscale_ip()
+    stats = await stats_task
+
+    gw_lines = ""
+    for t, (gw_ok, gw_status) in zip(targets, results):
+        gw_icon = "✅" if gw_ok else "🔴"
+        name = f"{t.name}: " if len(targets) > 1 else "Status: "
+        gw_lines += (
+            f"  {gw_icon} {name}{'Online' if gw_ok else 'OFFLINE'} ({gw_status})\n"
+            f"  🔗 {t.url}\n"
+        )
+        availability = _availability(config, t)
+        if availability is not None:
+            gw_lines += f"  📈 Availability: {availability}\n"
+
+    watcher_line = f"{len(config.get('watchers', {}).get('targets', []))} targets configured"
+    msg = format_briefing(stats, gw_lines, ts_ip, watcher_line)
+
     await alerter.send(msg, key="briefing")
+    await alerter.drain()
     print("Briefing sent")
 
 
+def _availability(config: dict, target) -> str | None:
+    # Read the ring file the daemon keeps — read-only, so a cron run can't
+    # create it or reset the daemon's history
+    try:
+        history = open_history(
+            config.get("gateway", {}), target, data_dir(config, "health"), readonly=True
+        )
+    except (OSError, ValueError) as e:
+        log.info("no probe history for %s: %s", target.name, e)
+        return None
+    try:
+        return format_availability(history)
+    finally:
+        history.close()
+
+
 def main():
     logging.basicConfig(level=logging.INFO)
     asyncio.run(run_briefing())
@@ -23,14 +23,14 @@ class Dashboard:
     def __init__(self, alerter=None, briefing_fn=None, config=None):
         self.alerter = alerter
         self.briefing_fn = briefing_fn
+        self.system = None  # SystemSampler, for CPU temp when the DHT11 has no reading
         self._config = config or {}
         self._gpio = None
         self._lcd = None
         self._available = False
         self._lcd_available = False
         self._dht_available = False
-        self._last_temp = None
-        self._last_humidity = None
+        self._dht_sampler = None
         self._last_gateway_ok = True
         self._last_uptime = ""
 
@@ -98,6 +98,10 @@ class Dashboard:
         # --- New display sub-drivers ---
         gpio_cfg = self._config.get("gpio", {})
 
+        # DHT11 is read on its own thread — never from the event loop
+        if self._dht_available:
+            self._setup_dht_sampler(gpio_cfg)
+
         # LED Bar Graph
         if gpio_cfg.get("bar_graph", True) and self._available:
             self._setup_bar_graph()
@@ -119,6 +123,20 @@ class Dashboard:
         if self._seven_seg or self._dot_matrix:
             self._setup_multiplex()
 
+    def _setup_dht_sampler(self, gpio_cfg: dict):
+        try:
+            from scout.gpio.dht_thread import DHTSampler
+            self._dht_sampler = DHTSampler(
+                self._dht,
+                interval=gpio_cfg.get("dht_interval", 3.0),
+                window=gpio_cfg.get("dht_window", 5),
+                stale_after=gpio_cfg.get("dht_stale_after", 300),
+            )
+            self._dht_sampler.start()
+        except Exception as e:
+            log.warning("DHT11 sampler setup failed: %s", e)
+            self._dht_sampler = None
+
     def _setup_bar_graph(self):
         try:
             from scout.gpio.bar_graph import BarGraph
@@ -241,18 +259,17 @@ class Dashboard:
     # --- DHT11 ---
 
     def read_dht11(self) -> tuple[float | None, float | None]:
-        if not self._dht_available:
-            return self._last_temp, self._last_humidity
-        try:
-            temp = self._dht.temperature
-            humidity = self._dht.humidity
-            if temp is not None:
-                self._last_temp = temp
-            if humidity is not None:
-                self._last_humidity = humidity
-        except Exception:
-            pass
-        return self._last_temp, self._last_humidity
+        """Latest filtered reading from the sampler thread — never touches the sensor."""
+        if self._dht_sampler is None:
+            return None, None
+        return self._dht_sampler.reading()
+
+    @property
+    def sensor_stats(self) -> dict | None:
+        """DHT11 read success rate and staleness, or None without a sensor."""
+        if self._dht_sampler is None:
+            return None
+        return self._dht_sampler.stats
 
     # --- LCD ---
 
@@ -298,10 +315,26 @@ class Dashboard:
             status = random.choice(self._DOWN_MESSAGES)
         if temp is not None:
             line2 = f"{temp:.0f}C {humidity:.0f}% {self._last_uptime}"
+        elif self.system is not None and self.system.snapshot.get("cpu_temp"):
+            line2 = f"CPU {self.system.snapshot['cpu_temp']:.0f}C {self._last_uptime}"
         else:
             line2 = self._last_uptime
         self.lcd_write(status, line2)
 
+    def state(self, health_status: str) -> dict:
+        """What the physical dashboard is currently showing."""
+        if self._last_gateway_ok:
+            led_state = "green"
+        elif health_status != "up":
+            led_state = "red"
+        else:
+            led_state = "yellow"
+        return {
+            "health_score": self._health_score,
+            "led_state": led_state,
+            "matrix_pattern": "smiley" if self._last_gateway_ok else "x",
+        }
+
     # --- Health score + new displays ---
 
     def on_health_check(self, ok: bool, consecutive_ok: int, uptime_seconds: int):
@@ -368,12 +401,17 @@ class Dashboard:
     # --- Cleanup ---
 
     def cleanup(self):
-        # Stop multiplex thread first
+        # Stop background threads first
         if self._multiplex:
             try:
                 self._multiplex.stop()
             except Exception:
                 pass
+        if self._dht_sampler:
+            try:
+                self._dht_sampler.stop()
+            except Exception:
+                pass
 
         # Clean up new displays
         if self._bar_graph:
@@ -0,0 +1,130 @@
+"""Background DHT11 sampler thread.
+
+A DHT11 read is a bit-banged transaction of a few milliseconds that
+fails often (checksum / timing errors), and the sensor must not be
+polled faster than about once a second. Reading it from the event loop
+stalled everything else, so a daemon thread reads it every `interval`
+seconds and publishes a timestamped, filtered value that the LCD and the
+stats pusher read without touching the sensor.
+
+Filtering: the published value is the median of the last `window` good
+readings. A reading further than max_jump from the current median is
+dropped as a glitch, unless `window` of them arrive in a row, in which
+case the temperature really changed and the window restarts from there.
+
+Shared state is guarded by a threading.Lock.
+"""
+
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+
+log = logging.getLogger("scout.gpio.dht")
+
+# The DHT11 needs ~1s between reads; adafruit_dht refuses anything faster than 2s
+MIN_INTERVAL = 2.0
+
+
+class DHTSampler:
+    """Daemon thread that polls a DHT11 and keeps a filtered reading."""
+
+    def __init__(self, sensor, interval: float = 3.0, window: int = 5,
+                 max_jump_temp: float = 5.0, max_jump_humidity: float = 15.0,
+                 stale_after: float = 300.0):
+        self._sensor = sensor
+        self.interval = max(interval, MIN_INTERVAL)
+        self.stale_after = stale_after
+        self._max_jump = (max_jump_temp, max_jump_humidity)
+        self._temps: deque[float] = deque(maxlen=window)
+        self._humidities: deque[float] = deque(maxlen=window)
+        self._outliers = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        # Published state
+        self._temp = None
+        self._humidity = None
+        self._updated = 0.0
+        self._reads = 0
+        self._ok = 0
+        self._rejected = 0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="dht11", daemon=True)
+        self._thread.start()
+        log.info("DHT11 sampler started — every %.0fs", self.interval)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+            log.info("DHT11 sampler stopped")
+
+    def _loop(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self._sample()
+            # Keep the read period even when a read was slow
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def _sample(self):
+        try:
+            temp = self._sensor.temperature
+            humidity = self._sensor.humidity
+        except Exception as e:
+            # Checksum / timing failures are routine on a DHT11
+            log.debug("DHT11 read failed: %s", e)
+            temp = humidity = None
+        with self._lock:
+            self._reads += 1
+            if temp is None or humidity is None:
+                return
+            self._ok += 1
+            if not self._accept(float(temp), float(humidity)):
+                self._rejected += 1
+                return
+            self._temp = statistics.median(self._temps)
+            self._humidity = statistics.median(self._humidities)
+            self._updated = time.time()
+
+    def _accept(self, temp: float, humidity: float) -> bool:
+        if len(self._temps) >= 3:
+            jump_t, jump_h = self._max_jump
+            if (abs(temp - statistics.median(self._temps)) > jump_t
+                    or abs(humidity - statistics.median(self._humidities)) > jump_h):
+                self._outliers += 1
+                if self._outliers < self._temps.maxlen:
+                    return False
+                # Consistently far off — a real change, not a glitch
+                log.info("DHT11 reading moved to %.0fC %.0f%% — resetting filter",
+                         temp, humidity)
+                self._temps.clear()
+                self._humidities.clear()
+        self._outliers = 0
+        self._temps.append(temp)
+        self._humidities.append(humidity)
+        return True
+
+    def reading(self) -> tuple[float | None, float | None]:
+        """Filtered (temperature, humidity), or (None, None) when stale."""
+        with self._lock:
+            if not self._updated or time.time() - self._updated > self.stale_after:
+                return None, None
+            return self._temp, self._humidity
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "reads": self._reads,
+                "success_rate": round(self._ok / self._reads, 3) if self._reads else None,
+                "rejected": self._rejected,
+                "updated": self._updated or None,
+                "age_s": round(time.time() - self._updated, 1) if self._updated else None,
+            }
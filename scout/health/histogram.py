@@ -0,0 +1,134 @@
+"""Latency histogram — fixed-memory, log-bucketed, with rolling windows.
+
+Buckets follow the HDR layout: each power of two is split into
+SUB_BUCKETS linear sub-buckets, so every bucket has the same relative
+width and reported percentiles (bucket midpoints) are within ~6% with
+8 sub-buckets. Values are milliseconds.
+
+Each rolling window is a ring of time slots; a slot holds one bucket-count
+row plus its max. Recording a sample touches one counter per window and
+never allocates. Expired slots are zeroed lazily when the ring wraps onto
+them, and queries merge only the slots still inside the window.
+"""
+
+import math
+import time
+from array import array
+
+SUB_BUCKETS = 8
+MIN_EXP = -4                 # 2^-4 ms  ≈ 62µs
+MAX_EXP = 18                 # 2^18 ms  ≈ 262s
+N_BUCKETS = (MAX_EXP - MIN_EXP) * SUB_BUCKETS
+
+# (label, window seconds, slot count)
+DEFAULT_WINDOWS = (
+    ("1h", 3600, 60),
+    ("24h", 86400, 24),
+    ("7d", 7 * 86400, 28),
+)
+
+
+def bucket_index(value: float) -> int:
+    if value <= 0:
+        return 0
+    mantissa, exp = math.frexp(value)  # value = mantissa * 2**exp, 0.5 <= mantissa < 1
+    idx = (exp - MIN_EXP) * SUB_BUCKETS + int((mantissa - 0.5) * 2 * SUB_BUCKETS)
+    if idx < 0:
+        return 0
+    if idx >= N_BUCKETS:
+        return N_BUCKETS - 1
+    return idx
+
+
+def bucket_value(idx: int) -> float:
+    """Midpoint of a bucket, in the same unit as recorded values."""
+    exp, sub = divmod(idx, SUB_BUCKETS)
+    return (0.5 + (sub + 0.5) / (2 * SUB_BUCKETS)) * 2.0 ** (exp + MIN_EXP)
+
+
+class _Window:
+    def __init__(self, span: float, slots: int):
+        self.slot_width = span / slots
+        self.slots = slots
+        self.counts = array("L", bytes(array("L").itemsize * slots * N_BUCKETS))
+        self.maxes = array("d", bytes(array("d").itemsize * slots))
+        self.epochs = array("q", [-1] * slots)
+        self._zero_row = array("L", bytes(array("L").itemsize * N_BUCKETS))
+
+    def record(self, idx: int, value: float, now: float):
+        slot_no = int(now // self.slot_width)
+        pos = slot_no % self.slots
+        if self.epochs[pos] != slot_no:
+            base = pos * N_BUCKETS
+            self.counts[base:base + N_BUCKETS] = self._zero_row
+            self.maxes[pos] = 0.0
+            self.epochs[pos] = slot_no
+        self.counts[pos * N_BUCKETS + idx] += 1
+        if value > self.maxes[pos]:
+            self.maxes[pos] = value
+
+    def merged(self, now: float) -> tuple[list[int], float]:
+        current = int(now // self.slot_width)
+        totals = [0] * N_BUCKETS
+        max_value = 0.0
+        for pos in range(self.slots):
+            epoch = self.epochs[pos]
+            if epoch < 0 or current - epoch >= self.slots:
+                continue
+            base = pos * N_BUCKETS
+            for i in range(N_BUCKETS):
+                c = self.counts[base + i]
+                if c:
+                    totals[i] += c
+            max_value = max(max_value, self.maxes[pos])
+        return totals, max_value
+
+
+class LatencyHistogram:
+    """Rolling latency percentiles over several windows at once."""
+
+    def __init__(self, windows=DEFAULT_WINDOWS):
+        self._windows = {label: _Window(span, slots) for label, span, slots in windows}
+        self._labels = tuple(self._windows)
+
+    @property
+    def windows(self) -> tuple[str, ...]:
+        return self._labels
+
+    def record(self, value: float, now: float | None = None):
+        if now is None:
+            now = time.time()
+        idx = bucket_index(value)
+        for w in self._windows.values():
+            w.record(idx, value, now)
+
+    def summary(self, window: str | None = None, now: float | None = None) -> dict:
+        """Return count, p50/p95/p99 and max for one window."""
+        if now is None:
+            now = time.time()
+        counts, max_value = self._windows[window or self._labels[0]].merged(now)
+        total = sum(counts)
+        result = {"count": total, "p50": None, "p95": None, "p99": None, "max": None}
+        if not total:
+            return result
+
+        targets = [("p50", 0.50), ("p95", 0.95), ("p99", 0.99)]
+        seen = 0
+        ti = 0
+        for idx, c in enumerate(counts):
+            if not c:
+                continue
+            seen += c
+            while ti < len(targets) and seen >= math.ceil(targets[ti][1] * total):
+                # Never report a bucket value above the true max
+                result[targets[ti][0]] = round(min(bucket_value(idx), max_value), 1)
+                ti += 1
+            if ti == len(targets):
+                break
+        result["max"] = round(max_value, 1)
+        return result
+
+    def summaries(self, now: float | None = None) -> dict:
+        if now is None:
+            now = time.time()
+        return {label: self.summary(label, now) for label in self._labels}
@@ -0,0 +1,214 @@
+"""Health history — every probe result in a memory-mapped ring file.
+
+The file is preallocated once: a 32-byte header followed by `capacity`
+fixed-size records. Appending writes one record in place and bumps the
+header, so each probe is an O(1) write to already-mapped pages that the
+kernel flushes in its normal writeback — no per-probe fsync, little SD wear.
+
+Record layout (12 bytes, little-endian):
+    uint32  timestamp (unix seconds)
+    uint8   ok
+    uint8   reserved
+    uint16  HTTP status (0 = no response)
+    float32 latency in ms (NaN = no response)
+"""
+
+import logging
+import math
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+
+log = logging.getLogger("scout.health.history")
+
+MAGIC = b"SCHR"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIII12x")   # magic, version, record size, capacity, head, count
+RECORD = struct.Struct("<IBxHf")
+
+DEFAULT_CAPACITY = 65536  # ~45 days at one probe per minute, 768 KB
+
+
+class HealthHistory:
+    def __init__(self, path: Path, capacity: int = DEFAULT_CAPACITY, readonly: bool = False):
+        self.path = Path(path)
+        self.capacity = capacity
+        self._head = 0
+        self._count = 0
+        if readonly:
+            self._open_readonly()
+        else:
+            self._open()
+
+    def _open(self):
+        size = HEADER.size + self.capacity * RECORD.size
+        fresh = not self.path.exists() or self.path.stat().st_size != size
+        if fresh and self.path.exists():
+            log.warning("history %s has unexpected size — recreating", self.path)
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fresh:
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+            self._mm = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        magic, version, rec_size, capacity, head, count = HEADER.unpack_from(self._mm, 0)
+        if fresh or magic != MAGIC or version != VERSION or rec_size != RECORD.size \
+                or capacity != self.capacity:
+            self._head = self._count = 0
+            self._write_header()
+        else:
+            self._head, self._count = head, count
+
+    def _open_readonly(self):
+        """Map an existing ring as it is, for readers outside the daemon.
+
+        Never creates, resizes or resets the file; the capacity comes from
+        its header. Raises OSError if it's missing, ValueError if it isn't
+        a complete ring.
+        """
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            size = os.fstat(fd).st_size
+            if size < HEADER.size:
+                raise ValueError(f"history {self.path} is too short")
+            self._mm = mmap.mmap(fd, size, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+
+        magic, version, rec_size, capacity, head, count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION or rec_size != RECORD.size \
+                or size != HEADER.size + capacity * RECORD.size:
+            self._mm.close()
+            raise ValueError(f"history {self.path} has an unexpected header or size")
+        self.capacity, self._head, self._count = capacity, head, count
+
+    def _write_header(self):
+        HEADER.pack_into(
+            self._mm, 0, MAGIC, VERSION, RECORD.size, self.capacity, self._head, self._count
+        )
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, ok: bool, status: int = 0, latency_ms: float | None = None,
+               ts: float | None = None):
+        RECORD.pack_into(
+            self._mm,
+            HEADER.size + self._head * RECORD.size,
+            int(ts if ts is not None else time.time()),
+            1 if ok else 0,
+            status,
+            math.nan if latency_ms is None else latency_ms,
+        )
+        self._head = (self._head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+        self._write_header()
+
+    def _slot(self, i: int) -> int:
+        """Physical slot of the i-th oldest record."""
+        return (self._head - self._count + i) % self.capacity
+
+    def _record(self, i: int) -> tuple[int, int, int, float]:
+        return RECORD.unpack_from(self._mm, HEADER.size + self._slot(i) * RECORD.size)
+
+    def _ts(self, i: int) -> int:
+        return struct.unpack_from("<I", self._mm, HEADER.size + self._slot(i) * RECORD.size)[0]
+
+    def _first_since(self, since: float) -> int:
+        """Index of the oldest record with ts >= since (binary search)."""
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._ts(mid) < since:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def records(self, since: float = 0):
+        """Yield (ts, ok, status, latency_ms) oldest first."""
+        for i in range(self._first_since(since), self._count):
+            ts, ok, status, latency = self._record(i)
+            yield ts, bool(ok), status, (None if math.isnan(latency) else latency)
+
+    def availability(self, window: float, now: float | None = None, max_gap: float = 300) -> dict:
+        """Time-weighted availability over the last `window` seconds.
+
+        Each result holds until the next probe, capped at max_gap so a
+        stopped daemon is counted as "no data" rather than up or down.
+        Weighting by time keeps the fast re-probes during an outage from
+        over-counting it.
+        """
+        if now is None:
+            now = time.time()
+        since = now - window
+        start = self._first_since(since)
+        # Include the probe just before the window — its state carries in
+        if start > 0:
+            start -= 1
+
+        up = down = 0.0
+        samples = failed = 0
+        prev = None
+        for i in range(start, self._count):
+            ts, ok, _, _ = self._record(i)
+            if prev is not None:
+                held = self._overlap(prev[0], ts, since, max_gap)
+                if prev[1]:
+                    up += held
+                else:
+                    down += held
+            if ts >= since:
+                samples += 1
+                failed += 0 if ok else 1
+            prev = (ts, ok)
+        if prev is not None:
+            held = self._overlap(prev[0], now, since, max_gap)
+            if prev[1]:
+                up += held
+            else:
+                down += held
+
+        covered = up + down
+        return {
+            "window_seconds": int(window),
+            "availability_pct": round(up / covered * 100, 3) if covered else None,
+            "samples": samples,
+            "failed": failed,
+            "down_seconds": int(down),
+            "covered_seconds": int(covered),
+        }
+
+    @staticmethod
+    def _overlap(ts: int, end: float, since: float, max_gap: float) -> float:
+        """Seconds a result at ts stays in effect inside [since, end]."""
+        return max(0.0, min(end, ts + max_gap) - max(ts, since))
+
+    def last_ok(self) -> int | None:
+        for i in range(self._count - 1, -1, -1):
+            ts, ok, _, _ = self._record(i)
+            if ok:
+                return ts
+        return None
+
+    def up_since(self) -> int | None:
+        """Timestamp of the first success after the most recent failure."""
+        since = None
+        for i in range(self._count - 1, -1, -1):
+            ts, ok, _, _ = self._record(i)
+            if not ok:
+                break
+            since = ts
+        return since
+
+    def close(self):
+        if self._mm is not None and not self._mm.closed:
+            self._mm.flush()
+            self._mm.close()
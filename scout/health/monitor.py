@@ -3,122 +3,321 @@
 import asyncio
 import logging
 import time
+from pathlib import Path
 
 import aiohttp
 
+from scout.health.histogram import LatencyHistogram
+from scout.health.history import DEFAULT_CAPACITY, HealthHistory
+from scout.health.phases import PhaseStats, ProbeTiming, phase_trace_config
+from scout.health.scheduler import AdaptiveSchedule
+from scout.health.target import GatewayTarget
+from scout.http_client import HttpClient
+from scout.storage import safe_name
+
 log = logging.getLogger("scout.health")
 
 
+def parse_targets(config: dict | list) -> list[GatewayTarget]:
+    """Build gateway targets from the `gateway` config section.
+
+    Accepts the legacy single `url`, a `targets` list whose entries inherit
+    the section-level defaults, or the section itself given as a list.
+    """
+    if isinstance(config, list):
+        config = {"targets": config}
+    defaults = {k: v for k, v in config.items() if k != "targets"}
+    entries = config.get("targets") or []
+    if not entries and config.get("url"):
+        entries = [{"name": config.get("name", "gateway"), "url": config["url"]}]
+    return [GatewayTarget.from_config(e, defaults, i) for i, e in enumerate(entries)]
+
+
+def open_history(config: dict | list, target: GatewayTarget, history_dir: Path,
+                 readonly: bool = False) -> HealthHistory:
+    """Open (or create) the on-disk probe history ring for one target.
+
+    readonly opens an existing ring without creating or resizing it (see
+    HealthHistory) — for reading the daemon's history from another process.
+    """
+    capacity = DEFAULT_CAPACITY
+    if isinstance(config, dict):
+        capacity = config.get("history_records", DEFAULT_CAPACITY)
+    return HealthHistory(history_dir / f"{safe_name(target.name)}.ring", capacity, readonly)
+
+
 class HealthMonitor:
-    def __init__(self, config: dict, alerter, dashboard=None):
-        self.url = config.get("url", "")
+    def __init__(
+        self,
+        config: dict | list,
+        alerter,
+        dashboard=None,
+        http: HttpClient | None = None,
+        history_dir: Path | None = None,
+    ):
+        if isinstance(config, list):
+            config = {"targets": config}
+        self.targets = parse_targets(config)
+        self.url = self.targets[0].url if self.targets else ""
         self.interval = config.get("health_interval", 60)
         self.timeout = config.get("timeout", 10)
         self.max_failures = config.get("max_failures", 3)
+        self.max_concurrency = config.get("max_concurrency", 8)
         self.alerter = alerter
         self.dashboard = dashboard
+        self.http = http or HttpClient()
+        self.schedule = AdaptiveSchedule.from_config(config)
+
+        # Instrumented mode: per-phase timing via aiohttp trace hooks
+        self.instrumented = config.get("instrumented", False)
+        if self.instrumented:
+            self.http.add_trace_config(phase_trace_config())
+            for t in self.targets:
+                t.phases = PhaseStats(
+                    factor=config.get("slow_factor", 3.0),
+                    min_ms=config.get("slow_min_ms", 50),
+                )
 
-        self._consecutive_failures = 0
-        self._consecutive_ok = 0
-        self._alerted = False
-        self._last_ok = None
-        self._start_time = time.time()
+        # Persistent probe history — uptime and last OK survive restarts
+        if history_dir is not None and config.get("history", True):
+            for t in self.targets:
+                t.history = open_history(config, t, history_dir)
+                t.restore_from_history()
+
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        # Probe latency across all targets (ms)
+        self.latency = LatencyHistogram()
 
     @property
     def status(self) -> str:
-        return "down" if self._alerted else "up"
+        down = sum(1 for t in self.targets if t.alerted)
+        if down == 0:
+            return "up"
+        return "down" if down == len(self.targets) else "degraded"
+
+    @property
+    def _alerted(self) -> bool:
+        return any(t.alerted for t in self.targets)
+
+    @property
+    def _last_ok(self) -> float | None:
+        times = [t.last_ok for t in self.targets if t.last_ok is not None]
+        return max(times) if times else None
 
     @property
     def consecutive_ok(self) -> int:
-        return self._consecutive_ok
+        if not self.targets:
+            return 0
+        return min(t.consecutive_ok for t in self.targets)
 
     @property
     def uptime_seconds(self) -> int:
         return self._uptime_seconds()
 
-    async def check(self) -> bool:
+    @property
+    def latency_p50(self) -> float | None:
+        return self.latency.summary()["p50"]
+
+    @property
+    def latency_p95(self) -> float | None:
+        return self.latency.summary()["p95"]
+
+    @property
+    def latency_p99(self) -> float | None:
+        return self.latency.summary()["p99"]
+
+    @property
+    def latency_max(self) -> float | None:
+        return self.latency.summary()["max"]
+
+    @property
+    def next_intervals(self) -> dict[str, float | None]:
+        """Delay chosen for each target's next probe, in seconds."""
+        return {t.name: t.next_interval for t in self.targets}
+
+    def availability(self, window: float) -> dict[str, dict]:
+        """Time-weighted availability per target from the on-disk history."""
+        return {
+            t.name: t.history.availability(window)
+            for t in self.targets if t.history is not None
+        }
+
+    def latency_summary(self) -> dict:
+        """Percentiles for every rolling window (1h, 24h, 7d)."""
+        return self.latency.summaries()
+
+    def targets_snapshot(self) -> list[dict]:
+        return [t.snapshot() for t in self.targets]
+
+    async def check(self, target: GatewayTarget | None = None) -> bool:
+        if target is None:
+            if not self.targets:
+                log.warning("health check skipped — no gateway configured")
+                return False
+            target = self.targets[0]
+        timing = ProbeTiming() if target.phases is not None else None
+        started = time.perf_counter()
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    self.url, timeout=aiohttp.ClientTimeout(total=self.timeout)
-                ) as resp:
-                    ok = resp.status < 500
-                    if ok:
-                        self._last_ok = time.time()
-                    return ok
+            async with self.http.get(
+                target.url,
+                timeout=aiohttp.ClientTimeout(total=target.timeout),
+                trace_request_ctx=timing,
+            ) as resp:
+                # Drain the body so the connection goes back to the pool
+                await resp.read()
+                # Only completed responses are timed; timeouts would just
+                # record the timeout value.
+                latency_ms = (time.perf_counter() - started) * 1000
+                target.last_latency_ms = latency_ms
+                self.latency.record(latency_ms)
+                if timing is not None:
+                    timing.body_done()
+                    if timing.complete:
+                        target.slow_phase = target.phases.record(timing)
+                ok = resp.status < 500
+                if target.history is not None:
+                    target.history.append(ok, resp.status, latency_ms)
+                return ok
         except Exception as e:
-            log.warning("health check failed: %s", e)
+            log.warning("health check failed [%s]: %s", target.name, e)
+            if target.history is not None:
+                target.history.append(False)
             return False
 
     def _uptime_str(self) -> str:
-        elapsed = int(time.time() - self._start_time)
+        elapsed = self._uptime_seconds()
         hours, remainder = divmod(elapsed, 3600)
         minutes, _ = divmod(remainder, 60)
         return f"Up {hours}h{minutes:02d}m"
 
     def _uptime_seconds(self) -> int:
-        return int(time.time() - self._start_time)
+        """Gateway uptime — the shortest among targets that are up.
+
+        Targets restore their up-since time from history, so this is real
+        gateway uptime rather than process uptime.
+        """
+        return min((t.uptime_seconds for t in self.targets if not t.alerted), default=0)
+
+    def _label(self, target: GatewayTarget) -> str:
+        if len(self.targets) > 1:
+            return f"gateway <b>{target.name}</b>"
+        return "gateway"
 
     async def run(self, stop: asyncio.Event):
-        log.info("health monitor started — checking %s every %ds", self.url, self.interval)
+        if not self.targets:
+            log.info("no gateway configured — health monitor idle")
+            await stop.wait()
+            return
+
+        log.info(
+            "health monitor started — %d target(s), checking every %ds "
+            "(confirm ladder %s, max %d concurrent)",
+            len(self.targets), self.interval, list(self.schedule.ladder), self.max_concurrency,
+        )
+        # Stagger start offsets so probes spread evenly over the interval
+        step = self.interval / len(self.targets)
+        await asyncio.gather(*(
+            self._run_target(t, i * step, stop) for i, t in enumerate(self.targets)
+        ))
+
+    async def _run_target(self, target: GatewayTarget, offset: float, stop: asyncio.Event):
+        if offset:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=offset)
+                return
+            except asyncio.TimeoutError:
+                pass
+
         while not stop.is_set():
             # Yellow LED while checking
             if self.dashboard:
                 self.dashboard.led_checking()
 
-            ok = await self.check()
-
-            if ok:
-                if self._alerted:
-                    log.info("gateway recovered")
-                    await self.alerter.send("Gateway RECOVERED — back online.")
-                    self._alerted = False
-                self._consecutive_failures = 0
-                self._consecutive_ok += 1
-                log.debug("gateway ok")
-
-                # Green LED + update LCD
-                if self.dashboard:
-                    self.dashboard.led_ok()
-                    self.dashboard.update_lcd(True, self._uptime_str())
-                    self.dashboard.on_health_check(
-                        True, self._consecutive_ok, self._uptime_seconds()
-                    )
-            else:
-                self._consecutive_failures += 1
-                self._consecutive_ok = 0
-                log.warning(
-                    "gateway unreachable (%d/%d)",
-                    self._consecutive_failures,
-                    self.max_failures,
-                )
+            async with self._semaphore:
+                ok = await self.check(target)
+
+            await self._handle_result(target, ok)
 
-                # Red LED
-                if self.dashboard:
-                    self.dashboard.led_fail()
-                    self.dashboard.update_lcd(False, self._uptime_str())
-                    self.dashboard.on_health_check(
-                        False, 0, self._uptime_seconds()
-                    )
-
-                if self._consecutive_failures >= self.max_failures and not self._alerted:
-                    await self.alerter.send(
-                        f"ALERT: OpenClaw gateway unreachable — "
-                        f"{self._consecutive_failures} consecutive failures. "
-                        f"Last OK: {self._format_last_ok()}"
-                    )
-                    self._alerted = True
-                    # Buzzer alarm
-                    if self.dashboard:
-                        await self.dashboard.alarm(pulses=3)
-                        self.dashboard.update_lcd(False, self._uptime_str())
+            interval = self.schedule.next_interval(target)
+            target.next_interval = interval
+            if self.schedule.delay(target) < self.interval:
+                log.info("%s next probe in %.1fs (fast schedule)", target.name, interval)
+            else:
+                log.debug("%s next probe in %.1fs", target.name, interval)
 
             try:
-                await asyncio.wait_for(stop.wait(), timeout=self.interval)
+                await asyncio.wait_for(stop.wait(), timeout=interval)
                 break
             except asyncio.TimeoutError:
                 pass
 
+    async def _handle_result(self, target: GatewayTarget, ok: bool):
+        transition = target.record(ok)
+        label = self._label(target)
+
+        if ok:
+            if transition == "recovered":
+                log.info("%s recovered", target.name)
+                await self.alerter.send(
+                    f"{label[0].upper()}{label[1:]} RECOVERED — back online.",
+                    key=target.alert_key("recovered"),
+                )
+            log.debug("%s ok", target.name)
+        else:
+            log.warning(
+                "%s unreachable (%d/%d)",
+                target.name,
+                target.consecutive_failures,
+                target.max_failures,
+            )
+
+        self._update_dashboard()
+
+        if ok and target.slow_phase:
+            phase, value, baseline = target.slow_phase
+            log.warning(
+                "%s slow %s: %.0fms (baseline %.0fms)", target.name, phase, value, baseline
+            )
+            await self.alerter.send(
+                f"SLOW: OpenClaw {label} — {phase.upper()} phase regressed to "
+                f"{value:.0f}ms (1h median {baseline:.0f}ms).",
+                key=target.alert_key(f"slow:{phase}"),
+            )
+            target.slow_phase = None
+
+        if transition == "down":
+            await self.alerter.send(
+                f"ALERT: OpenClaw {label} unreachable — "
+                f"{target.consecutive_failures} consecutive failures. "
+                f"Last OK: {target.format_last_ok()}",
+                key=target.alert_key("down"),
+            )
+            # Buzzer alarm
+            if self.dashboard:
+                await self.dashboard.alarm(pulses=3)
+                self.dashboard.update_lcd(False, self._uptime_str())
+
+    def _update_dashboard(self):
+        """Show the aggregate across all targets on the GPIO displays."""
+        if not self.dashboard:
+            return
+        all_ok = all(t.last_result is not False for t in self.targets)
+        if all_ok:
+            # Green LED + update LCD
+            self.dashboard.led_ok()
+        else:
+            # Red LED
+            self.dashboard.led_fail()
+        self.dashboard.update_lcd(all_ok, self._uptime_str())
+        self.dashboard.on_health_check(
+            all_ok, self.consecutive_ok, self._uptime_seconds()
+        )
+
+    def close(self):
+        for t in self.targets:
+            if t.history is not None:
+                t.history.close()
+
     def _format_last_ok(self) -> str:
         if self._last_ok is None:
             return "never"
@@ -0,0 +1,132 @@
+"""Probe phase timing — DNS, connect, TTFB and body via aiohttp trace hooks.
+
+An instrumented probe passes a ProbeTiming as `trace_request_ctx`; the
+trace config below stamps it as aiohttp moves through each phase. Requests
+without a ProbeTiming are ignored, so the hooks can live on the shared
+HttpClient session.
+
+aiohttp performs the TCP connect and TLS handshake inside a single
+connection-create step and has no separate TLS hook, so `connect` covers
+both. On a pooled keep-alive connection `dns` and `connect` are zero and
+only `ttfb`/`body` are recorded.
+"""
+
+import time
+
+import aiohttp
+
+from scout.health.histogram import LatencyHistogram
+
+PHASES = ("dns", "connect", "ttfb", "body")
+
+# Short window with coarse slots — phase baselines only need the last hour
+PHASE_WINDOWS = (("1h", 3600, 12),)
+
+
+class ProbeTiming:
+    """Per-request phase stamps, filled in by the trace hooks (ms)."""
+
+    __slots__ = (
+        "_t0", "_dns_start", "_conn_start", "_sent", "_headers",
+        "dns", "connect", "ttfb", "body",
+    )
+
+    def __init__(self):
+        self._t0 = time.perf_counter()
+        self._dns_start = self._conn_start = self._sent = self._headers = None
+        self.dns = self.connect = 0.0
+        self.ttfb = self.body = None
+
+    def body_done(self):
+        if self._headers is not None:
+            self.body = (time.perf_counter() - self._headers) * 1000
+
+    @property
+    def complete(self) -> bool:
+        return self.ttfb is not None and self.body is not None
+
+    def as_dict(self) -> dict:
+        return {p: round(getattr(self, p) or 0.0, 1) for p in PHASES}
+
+
+def _timing(ctx) -> ProbeTiming | None:
+    t = ctx.trace_request_ctx
+    return t if isinstance(t, ProbeTiming) else None
+
+
+def phase_trace_config() -> aiohttp.TraceConfig:
+    tc = aiohttp.TraceConfig()
+
+    async def on_dns_resolvehost_start(session, ctx, params):
+        if t := _timing(ctx):
+            t._dns_start = time.perf_counter()
+
+    async def on_dns_resolvehost_end(session, ctx, params):
+        if (t := _timing(ctx)) and t._dns_start is not None:
+            t.dns = (time.perf_counter() - t._dns_start) * 1000
+
+    async def on_connection_create_start(session, ctx, params):
+        if t := _timing(ctx):
+            t._conn_start = time.perf_counter()
+
+    async def on_connection_create_end(session, ctx, params):
+        if (t := _timing(ctx)) and t._conn_start is not None:
+            # DNS resolution happens inside connection create
+            t.connect = max(0.0, (time.perf_counter() - t._conn_start) * 1000 - t.dns)
+
+    async def on_request_headers_sent(session, ctx, params):
+        if t := _timing(ctx):
+            t._sent = time.perf_counter()
+
+    async def on_request_end(session, ctx, params):
+        if (t := _timing(ctx)) and t._sent is not None:
+            t._headers = time.perf_counter()
+            t.ttfb = (t._headers - t._sent) * 1000
+
+    tc.on_dns_resolvehost_start.append(on_dns_resolvehost_start)
+    tc.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+    tc.on_connection_create_start.append(on_connection_create_start)
+    tc.on_connection_create_end.append(on_connection_create_end)
+    tc.on_request_headers_sent.append(on_request_headers_sent)
+    tc.on_request_end.append(on_request_end)
+    return tc
+
+
+class PhaseStats:
+    """Rolling per-phase aggregates and regression detection for one target."""
+
+    def __init__(self, factor: float = 3.0, min_ms: float = 50, min_samples: int = 20):
+        self.factor = factor
+        self.min_ms = min_ms
+        self.min_samples = min_samples
+        self._hist = {p: LatencyHistogram(PHASE_WINDOWS) for p in PHASES}
+        self.last: dict | None = None
+
+    def record(self, timing: ProbeTiming) -> tuple[str, float, float] | None:
+        """Record a completed probe; return (phase, ms, baseline p50) if it regressed.
+
+        A phase regresses when it is at least min_ms and more than factor
+        times its rolling median. The baseline is read before recording so a
+        single slow sample cannot mask itself.
+        """
+        worst = None
+        for phase in PHASES:
+            value = getattr(timing, phase)
+            if value is None:
+                continue
+            # dns/connect only happen on fresh connections
+            if phase in ("dns", "connect") and value == 0.0:
+                continue
+            base = self._hist[phase].summary()
+            if base["count"] >= self.min_samples and value >= self.min_ms:
+                ratio = value / max(base["p50"], 0.1)
+                if ratio > self.factor and (worst is None or ratio > worst[0]):
+                    worst = (ratio, phase, value, base["p50"])
+            self._hist[phase].record(value)
+        self.last = timing.as_dict()
+        if worst is None:
+            return None
+        return worst[1], worst[2], worst[3]
+
+    def summary(self) -> dict:
+        return {p: self._hist[p].summary() for p in PHASES}
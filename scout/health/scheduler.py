@@ -0,0 +1,55 @@
+"""Adaptive health-check schedule — fast failure confirmation, slow when stable.
+
+A healthy gateway is probed every base interval. The first failure switches
+to a short confirmation ladder (e.g. 2s, 5s, 10s) so an outage is confirmed
+or cleared within seconds instead of max_failures × interval. While a
+gateway is down the delay backs off exponentially up to the base interval,
+and after recovery it relaxes the same way until the gateway is stable.
+"""
+
+import random
+
+
+class AdaptiveSchedule:
+    def __init__(
+        self,
+        base: float,
+        ladder=(2, 5, 10),
+        stable_after: int = 3,
+        jitter: float = 0.1,
+    ):
+        self.base = base
+        self.ladder = tuple(d for d in ladder if d < base) or (base,)
+        self.stable_after = stable_after
+        self.jitter = jitter
+
+    @classmethod
+    def from_config(cls, config: dict) -> "AdaptiveSchedule":
+        return cls(
+            base=config.get("health_interval", 60),
+            ladder=config.get("confirm_ladder", (2, 5, 10)),
+            stable_after=config.get("stable_after", 3),
+            jitter=config.get("jitter", 0.1),
+        )
+
+    def delay(self, target) -> float:
+        """Delay before the next probe of target, without jitter."""
+        failures = target.consecutive_failures
+        if failures:
+            if failures <= len(self.ladder):
+                return self.ladder[failures - 1]
+            # Down: back off from the last rung towards the base interval
+            extra = failures - len(self.ladder)
+            return min(self.base, self.ladder[-1] * 2 ** extra)
+
+        ok = target.consecutive_ok
+        if target.recovering and ok < self.stable_after:
+            # Just recovered: relax from the last rung back to base
+            return min(self.base, self.ladder[-1] * 2 ** (ok - 1))
+        return self.base
+
+    def next_interval(self, target) -> float:
+        d = self.delay(target)
+        if self.jitter:
+            d *= 1 + random.uniform(-self.jitter, self.jitter)
+        return max(0.5, d)
@@ -0,0 +1,114 @@
+"""Gateway target — per-gateway health state machine."""
+
+import time
+
+
+class GatewayTarget:
+    """Failure/recovery counters and alert state for one gateway.
+
+    record() feeds in probe results and returns the transition, if any:
+    "down" once max_failures consecutive probes have failed, "recovered" on
+    the first success after that, otherwise None.
+    """
+
+    def __init__(self, name: str, url: str, timeout: float, max_failures: int):
+        self.name = name
+        self.url = url
+        self.timeout = timeout
+        self.max_failures = max_failures
+
+        self.consecutive_failures = 0
+        self.consecutive_ok = 0
+        self.alerted = False
+        self.last_ok: float | None = None
+        self.last_result: bool | None = None
+        self.last_latency_ms: float | None = None
+        # True once a failure has been seen, so the scheduler relaxes gradually
+        self.recovering = False
+        self.next_interval: float | None = None
+        # Set by HealthMonitor in instrumented mode
+        self.phases = None
+        self.slow_phase: tuple[str, float, float] | None = None
+        self.history = None
+        self._up_since = time.time()
+
+    @classmethod
+    def from_config(cls, cfg: dict, defaults: dict, index: int = 0) -> "GatewayTarget":
+        merged = {**defaults, **cfg}
+        return cls(
+            name=merged.get("name") or f"gateway{index + 1}",
+            url=merged.get("url", ""),
+            timeout=merged.get("timeout", 10),
+            max_failures=merged.get("max_failures", 3),
+        )
+
+    def restore_from_history(self):
+        """Pick up last OK and up-since from the persisted probe history."""
+        last_ok = self.history.last_ok()
+        if last_ok is not None:
+            self.last_ok = float(last_ok)
+        up_since = self.history.up_since()
+        if up_since is not None:
+            self._up_since = float(up_since)
+
+    @property
+    def status(self) -> str:
+        return "down" if self.alerted else "up"
+
+    @property
+    def uptime_seconds(self) -> int:
+        if self.alerted:
+            return 0
+        return int(time.time() - self._up_since)
+
+    def alert_key(self, kind: str) -> str:
+        return f"gateway:{self.name}:{kind}"
+
+    def record(self, ok: bool) -> str | None:
+        self.last_result = ok
+        if ok:
+            self.last_ok = time.time()
+            if self.consecutive_failures:
+                self.recovering = True
+            self.consecutive_failures = 0
+            self.consecutive_ok += 1
+            if self.alerted:
+                self.alerted = False
+                self._up_since = time.time()
+                return "recovered"
+            return None
+
+        self.consecutive_failures += 1
+        self.consecutive_ok = 0
+        if self.consecutive_failures >= self.max_failures and not self.alerted:
+            self.alerted = True
+            return "down"
+        return None
+
+    def format_last_ok(self) -> str:
+        if self.last_ok is None:
+            return "never"
+        ago = int(time.time() - self.last_ok)
+        if ago < 60:
+            return f"{ago}s ago"
+        return f"{ago // 60}m ago"
+
+    def snapshot(self) -> dict:
+        snap = {
+            "name": self.name,
+            "url": self.url,
+            "status": self.status,
+            "consecutive_ok": self.consecutive_ok,
+            "consecutive_failures": self.consecutive_failures,
+            "uptime_seconds": self.uptime_seconds,
+            "last_ok": self.last_ok,
+            "next_interval": (
+                round(self.next_interval, 1) if self.next_interval is not None else None
+            ),
+            "last_latency_ms": (
+                round(self.last_latency_ms, 1) if self.last_latency_ms is not None else None
+            ),
+        }
+        if self.phases is not None:
+            snap["phases_ms"] = {"last": self.phases.last, "1h": self.phases.summary()}
+        return snap
@@ -0,0 +1,121 @@
+"""Shared HTTP client — one pooled aiohttp session for every outbound call.
+
+Opening a fresh ClientSession per request means every probe pays DNS, TCP
+and TLS setup. The daemon instead creates a single HttpClient in
+scout.main.run and injects it into each subsystem, so connections are kept
+alive and reused across checks.
+"""
+
+import logging
+import ssl
+
+import aiohttp
+
+log = logging.getLogger("scout.http")
+
+
+class HttpClient:
+    """Long-lived aiohttp session with keep-alive pooling and a DNS cache.
+
+    The session is created lazily on first use so it is always bound to the
+    running event loop.
+    """
+
+    def __init__(self, config: dict | None = None):
+        config = config or {}
+        self.pool_size = config.get("pool_size", 32)
+        self.per_host_limit = config.get("per_host_limit", 4)
+        self.dns_ttl = config.get("dns_ttl", 300)
+        self.keepalive_timeout = config.get("keepalive_timeout", 120)
+
+        # One SSL context for the whole process — loading the CA store is
+        # the expensive part of TLS setup on a Pi.
+        self._ssl = ssl.create_default_context()
+        self._session: aiohttp.ClientSession | None = None
+        self._trace_configs: list[aiohttp.TraceConfig] = []
+
+        self._requests = 0
+        self._pool_hits = 0
+        self._pool_misses = 0
+        self._dns_hits = 0
+        self._dns_misses = 0
+
+    def add_trace_config(self, trace_config: aiohttp.TraceConfig):
+        """Register extra tracing hooks. Must be called before first use."""
+        if self._session is not None:
+            raise RuntimeError("HttpClient session already started")
+        self._trace_configs.append(trace_config)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+        return self._session
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.per_host_limit,
+            ttl_dns_cache=self.dns_ttl,
+            use_dns_cache=True,
+            keepalive_timeout=self.keepalive_timeout,
+            ssl=self._ssl,
+        )
+        log.debug(
+            "http session created — pool %d, %d/host, dns ttl %ds",
+            self.pool_size, self.per_host_limit, self.dns_ttl,
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            trace_configs=[self._stats_trace_config()] + self._trace_configs,
+        )
+
+    def _stats_trace_config(self) -> aiohttp.TraceConfig:
+        tc = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            self._requests += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self._pool_hits += 1
+
+        async def on_connection_create_end(session, ctx, params):
+            self._pool_misses += 1
+
+        async def on_dns_cache_hit(session, ctx, params):
+            self._dns_hits += 1
+
+        async def on_dns_cache_miss(session, ctx, params):
+            self._dns_misses += 1
+
+        tc.on_request_start.append(on_request_start)
+        tc.on_connection_reuseconn.append(on_connection_reuseconn)
+        tc.on_connection_create_end.append(on_connection_create_end)
+        tc.on_dns_cache_hit.append(on_dns_cache_hit)
+        tc.on_dns_cache_miss.append(on_dns_cache_miss)
+        return tc
+
+    def get(self, url: str, **kwargs):
+        return self.session.get(url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.session.post(url, **kwargs)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "requests": self._requests,
+            "pool_hits": self._pool_hits,
+            "pool_misses": self._pool_misses,
+            "dns_cache_hits": self._dns_hits,
+            "dns_cache_misses": self._dns_misses,
+        }
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            log.info(
+                "http client closed — %d requests, %d pooled, %d new connections",
+                self._requests, self._pool_hits, self._pool_misses,
+            )
+        self._session = None
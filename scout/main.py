@@ -10,9 +10,14 @@ import yaml
 
 from scout.health.monitor import HealthMonitor
 from scout.watchers.watcher import WatcherManager
-from scout.alerts.telegram import TelegramAlerter
+from scout.alerts.dispatcher import AlertDispatcher
+from scout.briefing import Briefing
 from scout.gpio.dashboard import Dashboard
+from scout.http_client import HttpClient
+from scout.metrics_server import MetricsServer
 from scout.stats_pusher import StatsPusher
+from scout.storage import data_dir
+from scout.system.sampler import SystemSampler
 
 CONFIG_PATH = Path(__file__).parent.parent / "config" / "scout.yaml"
 
@@ -39,22 +44,50 @@ async def run():
 
     log.info("clawpi-scout starting")
 
-    alerter = TelegramAlerter(config.get("telegram", {}))
+    # One pooled HTTP client shared by every outbound call
+    http = HttpClient(config.get("http", {}))
+
+    # Every alert goes through the dispatcher to all configured sinks
+    alerter = AlertDispatcher(
+        config,
+        http=http,
+        state_dir=data_dir(config, "alerts"),
+    )
 
     # GPIO dashboard
     dashboard = Dashboard(alerter=alerter, config=config)
     dashboard.setup()
 
-    # Wire briefing function for button press
-    async def on_button_briefing():
-        from scout.briefing import run_briefing
-        await run_briefing()
+    health = HealthMonitor(
+        config.get("gateway", {}),
+        alerter,
+        dashboard=dashboard,
+        http=http,
+        history_dir=data_dir(config, "health"),
+    )
+    watchers = WatcherManager(
+        config.get("watchers", {}),
+        alerter,
+        http=http,
+        state_dir=data_dir(config, "watchers"),
+    )
+    # One /proc reader; everyone else reads its snapshot
+    system = SystemSampler(config.get("system", {}))
+    dashboard.system = system
+    stats_pusher = StatsPusher(
+        config, health, dashboard, alerter, http=http, watchers=watchers, system=system,
+        state_dir=data_dir(config, "stats"),
+    )
 
-    dashboard.briefing_fn = on_button_briefing
+    # Optional local endpoint for scrapers — serves the same in-memory state
+    metrics_server = MetricsServer(
+        config, health, dashboard, alerter,
+        watchers=watchers, system=system, stats_pusher=stats_pusher, http=http,
+    )
 
-    health = HealthMonitor(config.get("gateway", {}), alerter, dashboard=dashboard)
-    watchers = WatcherManager(config.get("watchers", {}), alerter)
-    stats_pusher = StatsPusher(config, health, dashboard, alerter)
+    # Button press renders the briefing from live state — no probes or config reload
+    briefing = Briefing(config, alerter, health, watchers=watchers, system=system)
+    dashboard.briefing_fn = briefing.send
 
     loop = asyncio.get_event_loop()
     stop = asyncio.Event()
@@ -62,11 +95,16 @@ async def run():
     for sig in (signal.SIGINT, signal.SIGTERM):
         loop.add_signal_handler(sig, stop.set)
 
+    # Alerts are queued by everyone and sent from each sink's own worker
+    alert_task = asyncio.create_task(alerter.run(stop))
     tasks = [
+        asyncio.create_task(system.run(stop)),
         asyncio.create_task(health.run(stop)),
         asyncio.create_task(watchers.run(stop)),
         asyncio.create_task(dashboard.watch_button(stop)),
         asyncio.create_task(stats_pusher.run(stop)),
+        asyncio.create_task(briefing.run(stop)),
+        asyncio.create_task(metrics_server.run(stop)),
     ]
 
     log.info("all scouts active — monitoring")
@@ -77,6 +115,15 @@ async def run():
         t.cancel()
     await asyncio.gather(*tasks, return_exceptions=True)
 
+    # Give queued alerts a moment to go out before the client closes
+    try:
+        await asyncio.wait_for(alert_task, timeout=10)
+    except asyncio.TimeoutError:
+        log.warning("alert queue not drained — %d alerts lost", alerter.stats["queue_depth"])
+
+    await http.close()
+    health.close()
+    system.close()
     dashboard.cleanup()
     log.info("clawpi-scout stopped")
 
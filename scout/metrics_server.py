@@ -0,0 +1,288 @@
+"""Metrics server — the daemon's current state over HTTP, for scrapers.
+
+An optional aiohttp.web server running on the daemon's own event loop:
+
+    GET /metrics       Prometheus text format
+    GET /stats.json    the same data as JSON
+    GET /healthz       200 "ok" while the daemon is running
+
+Everything is rendered from state the daemon already keeps in memory —
+the system sampler's snapshot and window, the DHT11 sampler's cached
+reading, probe results, watcher state and component stats — so a scrape
+never reads /proc, touches the sensor or makes a request. The rendered
+snapshot is reused for cache_ttl seconds, so any number of scrapers
+cost about one render per second.
+
+Off by default; enable it under server: in the config.
+"""
+
+import asyncio
+import json
+import logging
+import time
+
+from aiohttp import web
+
+log = logging.getLogger("scout.metrics_server")
+
+PROM_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class _Families:
+    """Collects samples per metric family and renders the exposition text."""
+
+    def __init__(self):
+        self._families: dict[str, tuple[str, str, list[str]]] = {}
+
+    def add(self, name: str, value, help_text: str, kind: str = "gauge", **labels):
+        if value is None:
+            return
+        if isinstance(value, bool):
+            value = int(value)
+        family = self._families.setdefault(f"scout_{name}", (kind, help_text, []))
+        label_str = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+        family[2].append(f"scout_{name}{{{label_str}}} {value}" if labels
+                         else f"scout_{name} {value}")
+
+    def render(self) -> str:
+        lines = []
+        for name, (kind, help_text, samples) in self._families.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    def __init__(
+        self,
+        config: dict,
+        health,
+        dashboard,
+        alerter,
+        watchers=None,
+        system=None,
+        stats_pusher=None,
+        http=None,
+    ):
+        server_cfg = config.get("server", {})
+        self.enabled = server_cfg.get("enabled", False)
+        self.host = server_cfg.get("host", "127.0.0.1")
+        self.port = server_cfg.get("port", 9105)
+        self.cache_ttl = server_cfg.get("cache_ttl", 1.0)
+        self.health = health
+        self.dashboard = dashboard
+        self.alerter = alerter
+        self.watchers = watchers
+        self.system = system
+        self.stats_pusher = stats_pusher
+        self.http = http
+        self._cached: dict | None = None
+        self._cached_at = 0.0
+        self._scrapes = 0
+        self._renders = 0
+        self._render_ms = 0.0
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "scrapes": self._scrapes,
+            "renders": self._renders,
+            "render_ms": round(self._render_ms, 2),
+        }
+
+    def snapshot(self) -> dict:
+        """Current state as one dict, rebuilt at most every cache_ttl seconds."""
+        now = time.monotonic()
+        if self._cached is not None and now - self._cached_at < self.cache_ttl:
+            return self._cached
+        started = time.perf_counter()
+        temp, humidity = self.dashboard.read_dht11()
+        snap = {
+            "ts": time.time(),
+            "gateway": {
+                "status": self.health.status,
+                "consecutive_ok": self.health.consecutive_ok,
+                "uptime_seconds": self.health.uptime_seconds,
+                "latency_ms": self.health.latency_summary(),
+                "targets": self.health.targets_snapshot(),
+            },
+            "sensor": {
+                "temperature": temp,
+                "humidity": humidity,
+                "dht11": self.dashboard.sensor_stats,
+            },
+            "gpio": self.dashboard.state(self.health.status),
+            "internal": {
+                "alerter": self.alerter.stats,
+            },
+        }
+        if self.watchers is not None:
+            snap["watchers"] = {
+                "stats": self.watchers.stats,
+                "targets": self.watchers.target_states(),
+            }
+        if self.system is not None:
+            # summary() leaves the window alone — the pusher still take()s it
+            snap["system"] = {**self.system.snapshot, "window": self.system.window.summary()}
+            snap["internal"]["sampler"] = self.system.stats
+        if self.stats_pusher is not None:
+            snap["internal"]["pusher"] = self.stats_pusher.stats
+        if self.http is not None:
+            snap["internal"]["http"] = self.http.stats
+        self._renders += 1
+        self._render_ms = (time.perf_counter() - started) * 1000
+        snap["internal"]["server"] = self.stats
+        self._cached = snap
+        self._cached_at = now
+        return snap
+
+    def render_prometheus(self, snap: dict) -> str:
+        m = _Families()
+        gw = snap["gateway"]
+        m.add("gateway_up", gw["status"] == "up", "1 if the gateway is up overall")
+        m.add("gateway_uptime_seconds", gw["uptime_seconds"], "Seconds since the gateway came up")
+        for t in gw["targets"]:
+            name = t["name"]
+            m.add("target_up", t["status"] == "up", "1 if the target is up", target=name)
+            m.add("target_consecutive_failures", t["consecutive_failures"],
+                  "Failed probes in a row", target=name)
+            m.add("target_last_latency_ms", t["last_latency_ms"],
+                  "Latency of the last completed probe", target=name)
+            m.add("target_last_ok_timestamp_seconds", t["last_ok"],
+                  "Time of the last successful probe", target=name)
+        for window, summary in gw["latency_ms"].items():
+            m.add("probe_latency_count", summary["count"],
+                  "Probes recorded in the window", window=window)
+            for q, quantile in (("p50", "0.5"), ("p95", "0.95"), ("p99", "0.99")):
+                m.add("probe_latency_ms", summary[q], "Probe latency percentile",
+                      window=window, quantile=quantile)
+            m.add("probe_latency_max_ms", summary["max"], "Slowest probe in the window",
+                  window=window)
+
+        for t in snap.get("watchers", {}).get("targets", []):
+            name = t["name"]
+            m.add("watcher_error_streak", t["error_streak"], "Failed checks in a row",
+                  target=name)
+            m.add("watcher_last_check_timestamp_seconds", t["last_check"],
+                  "Time of the last check", target=name)
+            m.add("watcher_last_change_timestamp_seconds", t["last_change"],
+                  "Time the content last changed", target=name)
+            m.add("watcher_truncated", t["truncated"], "1 if the body hit max_bytes", target=name)
+
+        system = snap.get("system")
+        if system:
+            m.add("cpu_temp_celsius", system["cpu_temp"], "SoC temperature")
+            m.add("load1", system["load_avg"].split(" / ")[0], "1-minute load average")
+            m.add("memory_total_mb", system["mem_total_mb"], "Total memory")
+            m.add("memory_available_mb", system["mem_available_mb"], "Available memory")
+            m.add("disk_used_pct", system["disk_used_pct"], "Root filesystem used")
+            m.add("disk_free_gb", system["disk_free_gb"], "Root filesystem free")
+            cpu = system.get("cpu") or {}
+            m.add("cpu_busy_pct", cpu.get("total_pct"), "CPU busy over the last sample")
+            m.add("cpu_iowait_pct", cpu.get("iowait_pct"), "CPU iowait over the last sample")
+            for n, pct in enumerate(cpu.get("cores_pct", [])):
+                m.add("cpu_core_busy_pct", pct, "Per-core CPU busy", core=n)
+            for iface, rate in (system.get("net") or {}).items():
+                m.add("net_rx_bps", rate["rx_bps"], "Receive bytes per second", interface=iface)
+                m.add("net_tx_bps", rate["tx_bps"], "Transmit bytes per second", interface=iface)
+            for dev, io in (system.get("disk_io") or {}).items():
+                m.add("disk_read_kbps", io["read_kbps"], "Disk read KiB per second", device=dev)
+                m.add("disk_write_kbps", io["write_kbps"], "Disk write KiB per second",
+                      device=dev)
+                m.add("disk_util_pct", io["util_pct"], "Time the disk was busy", device=dev)
+
+        sensor = snap["sensor"]
+        m.add("sensor_temperature_celsius", sensor["temperature"], "DHT11 temperature (filtered)")
+        m.add("sensor_humidity_pct", sensor["humidity"], "DHT11 relative humidity (filtered)")
+        dht = sensor["dht11"] or {}
+        m.add("sensor_reads_total", dht.get("reads"), "DHT11 read attempts", "counter")
+        m.add("sensor_read_success_ratio", dht.get("success_rate"), "DHT11 reads that succeeded")
+        m.add("sensor_age_seconds", dht.get("age_s"), "Age of the published DHT11 reading")
+
+        gpio = snap["gpio"]
+        m.add("health_score", gpio["health_score"], "Bar graph health score (0-10)")
+        for state in ("green", "yellow", "red"):
+            m.add("led_state", gpio["led_state"] == state, "Status LED currently lit",
+                  state=state)
+
+        internal = snap["internal"]
+        alerter = internal["alerter"]
+        m.add("alert_queue_depth", alerter["queue_depth"], "Alerts waiting in sink queues")
+        m.add("alerts_suppressed_total", alerter["suppressed"], "Alerts held back by cooldown",
+              "counter")
+        for sink, st in alerter["sinks"].items():
+            m.add("alert_sink_queue_depth", st["queue_depth"], "Alerts queued per sink",
+                  sink=sink)
+            for field in ("sent", "dropped", "failed"):
+                m.add(f"alert_sink_{field}_total", st[field], f"Alerts {field} per sink",
+                      "counter", sink=sink)
+        sampler = internal.get("sampler")
+        if sampler:
+            m.add("sampler_samples_total", sampler["samples"], "System samples taken", "counter")
+            m.add("sampler_errors_total", sampler["errors"], "System samples failed", "counter")
+            m.add("sampler_sample_us", sampler["sample_us"]["p50"], "Median cost of a sample")
+        pusher = internal.get("pusher") or {}
+        if pusher.get("spool"):
+            m.add("stats_spool_pending", pusher["spool"]["pending"], "Stats pushes awaiting backfill")
+            m.add("stats_spool_bytes", pusher["spool"]["bytes"], "Stats spool size on disk")
+            m.add("stats_spool_dropped_total", pusher["spool"]["dropped"],
+                  "Spooled pushes dropped when full", "counter")
+        if pusher.get("batch"):
+            m.add("stats_batch_pending", pusher["batch"]["pending"], "Stats samples not yet sent")
+        http = internal.get("http")
+        if http:
+            m.add("http_requests_total", http["requests"], "Outbound HTTP requests", "counter")
+            m.add("http_pool_hits_total", http["pool_hits"],
+                  "Requests that reused a pooled connection", "counter")
+            m.add("http_pool_misses_total", http["pool_misses"],
+                  "Requests that opened a new connection", "counter")
+            m.add("http_dns_cache_hits_total", http["dns_cache_hits"], "DNS cache hits", "counter")
+            m.add("http_dns_cache_misses_total", http["dns_cache_misses"], "DNS cache misses",
+                  "counter")
+        m.add("scrapes_total", self._scrapes, "Requests served by this endpoint", "counter")
+        return m.render()
+
+    async def _metrics(self, request: web.Request) -> web.Response:
+        self._scrapes += 1
+        body = self.render_prometheus(self.snapshot())
+        return web.Response(body=body.encode(), headers={"Content-Type": PROM_CONTENT_TYPE})
+
+    async def _stats_json(self, request: web.Request) -> web.Response:
+        self._scrapes += 1
+        return web.Response(
+            text=json.dumps(self.snapshot(), default=str), content_type="application/json"
+        )
+
+    async def _healthz(self, request: web.Request) -> web.Response:
+        return web.Response(text="ok")
+
+    async def run(self, stop: asyncio.Event):
+        if not self.enabled:
+            await stop.wait()
+            return
+
+        app = web.Application()
+        app.router.add_get("/metrics", self._metrics)
+        app.router.add_get("/stats.json", self._stats_json)
+        app.router.add_get("/healthz", self._healthz)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, self.host, self.port).start()
+        except OSError as e:
+            log.error("metrics server could not listen on %s:%d: %s", self.host, self.port, e)
+            await runner.cleanup()
+            await stop.wait()
+            return
+
+        log.info("metrics server listening on http://%s:%d", self.host, self.port)
+        try:
+            await stop.wait()
+        finally:
+            await runner.cleanup()
+            log.info("metrics server stopped")
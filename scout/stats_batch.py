@@ -0,0 +1,141 @@
+"""Stats batching — several pushes in one gzip-compressed, delta-encoded request.
+
+Body format ("delta-v1"):
+
+    {
+      "machine": "clawpiscout",
+      "format": "delta-v1",
+      "base_seq": 41,              # last sample the server acknowledged, or null
+      "backfill": true,            # only on batches replayed from the spool
+      "samples": [
+        {"seq": 42, "ts": ..., "full": false,
+         "data": {...},            # only fields that changed since the previous sample
+         "alerts": [...]},         # alerts not sent before (append, never repeated)
+        ...
+      ]
+    }
+
+Each sample is diffed against the one before it; the first against the
+last acknowledged sample. Nested dicts are diffed recursively, lists are
+replaced whole, and a field that disappeared is sent as null. Samples
+are kept unencoded until acknowledged, so a failed push is simply
+re-encoded next time. The server can ask for a full snapshot by
+answering 409 or {"resync": true}; the next batch then starts with
+"full": true.
+
+Backfill batches replayed from the spool are encoded by a separate
+batcher: their seq numbers are their own, base_seq is null, the first
+sample is full, and acknowledging them never moves the live base.
+"""
+
+import gzip
+import json
+import logging
+
+log = logging.getLogger("scout.stats_batch")
+
+
+def delta(prev: dict, cur: dict) -> dict:
+    """Fields of cur that differ from prev (recursively for nested dicts)."""
+    out = {}
+    for key, value in cur.items():
+        old = prev.get(key)
+        if value == old:
+            continue
+        if isinstance(value, dict) and isinstance(old, dict):
+            out[key] = delta(old, value)
+        else:
+            out[key] = value
+    for key in prev.keys() - cur.keys():
+        out[key] = None
+    return out
+
+
+def _last_alert_ts(payload: dict | None) -> float:
+    if payload is None or not payload.get("alerts"):
+        return 0.0
+    return max(a["ts"] for a in payload["alerts"])
+
+
+class StatsBatcher:
+    def __init__(self, config: dict, machine: str = "clawpiscout"):
+        self.size = config.get("size", 5)
+        self.max_pending = config.get("max_pending", 60)
+        self.level = config.get("gzip_level", 6)
+        self.machine = machine
+        self._pending: list[tuple[int, dict]] = []
+        self._acked: tuple[int, dict] | None = None
+        self._seq = 0
+        self.requests = 0
+        self.raw_bytes = 0
+        self.wire_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    @property
+    def ready(self) -> bool:
+        return len(self._pending) >= self.size
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "requests": self.requests,
+            "raw_bytes": self.raw_bytes,
+            "wire_bytes": self.wire_bytes,
+        }
+
+    def add(self, payload: dict):
+        self._seq += 1
+        self._pending.append((self._seq, payload))
+        if len(self._pending) > self.max_pending:
+            dropped = len(self._pending) - self.max_pending
+            del self._pending[:dropped]
+            log.warning("stats batch full — dropped %d oldest samples", dropped)
+
+    def take(self) -> list[dict]:
+        """Remove and return every pending payload, oldest first."""
+        payloads = [payload for _, payload in self._pending]
+        self._pending.clear()
+        return payloads
+
+    def encode(self, backfill: bool = False) -> tuple[bytes, int]:
+        """Gzipped body for everything pending, and how many samples it holds."""
+        base_seq, prev = self._acked if self._acked is not None else (None, None)
+        samples = []
+        raw = 0
+        for seq, payload in self._pending:
+            since = _last_alert_ts(prev)
+            alerts = [a for a in payload.get("alerts", []) if a["ts"] > since]
+            data = {k: v for k, v in payload.items() if k not in ("alerts", "ts")}
+            if prev is not None:
+                data = delta({k: v for k, v in prev.items() if k not in ("alerts", "ts")}, data)
+            sample = {"seq": seq, "ts": payload.get("ts"), "full": prev is None, "data": data}
+            if alerts:
+                sample["alerts"] = alerts
+            samples.append(sample)
+            raw += len(json.dumps(payload, separators=(",", ":")))
+            prev = payload
+        doc = {
+            "machine": self.machine,
+            "format": "delta-v1",
+            "base_seq": base_seq,
+            "samples": samples,
+        }
+        if backfill:
+            doc["backfill"] = True
+        body = json.dumps(doc, separators=(",", ":")).encode()
+        packed = gzip.compress(body, self.level)
+        self.requests += 1
+        self.raw_bytes += raw
+        self.wire_bytes += len(packed)
+        return packed, len(samples)
+
+    def ack(self, count: int):
+        self._acked = self._pending[count - 1]
+        del self._pending[:count]
+
+    def resync(self):
+        """Server lost our base — the next batch starts from a full snapshot."""
+        self._acked = None
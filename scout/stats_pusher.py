@@ -1,18 +1,52 @@
-"""Stats pusher — sends dashboard data to Vercel API."""
+"""Stats pusher — sends dashboard data to Vercel API.
+
+By default every interval is one JSON POST. With dashboard.batch.enabled
+the payloads are collected and sent `size` at a time as one gzipped,
+delta-encoded request (see stats_batch.py).
+
+Pushes that fail with a network error, 5xx or 429 are written to an
+on-disk spool (see stats_spool.py) instead of being lost. After the next
+successful push the spool is replayed oldest first, at most drain_batch
+payloads per interval and drain_rate requests per second. Replayed data
+is flagged "backfill" so the dashboard can file it as history without
+replacing current state. Any other 4xx means the dashboard refused the
+data, so it is logged and dropped rather than retried forever.
+"""
 
 import asyncio
+import json
 import logging
 import time
+from pathlib import Path
 
 import aiohttp
 
-from scout.briefing import get_system_stats
+from scout.alerts.ratelimit import TokenBucket
+from scout.alerts.sinks import REJECTED, SENT, UNDELIVERED
+from scout.http_client import HttpClient
+from scout.stats_batch import StatsBatcher
+from scout.stats_spool import StatsSpool
+from scout.system.sampler import SystemSampler
 
 log = logging.getLogger("scout.stats_pusher")
 
+# Batch push result: the dashboard lost our base (409) — nothing to spool,
+# the pending samples go again as a full batch on the next push
+RESYNC = "resync"
+
 
 class StatsPusher:
-    def __init__(self, config: dict, health, dashboard, alerter):
+    def __init__(
+        self,
+        config: dict,
+        health,
+        dashboard,
+        alerter,
+        http: HttpClient | None = None,
+        watchers=None,
+        system: SystemSampler | None = None,
+        state_dir: Path | None = None,
+    ):
         dash_cfg = config.get("dashboard", {})
         self.url = dash_cfg.get("url", "")
         self.api_key = dash_cfg.get("api_key", "")
@@ -20,48 +54,56 @@ class StatsPusher:
         self.health = health
         self.dashboard = dashboard
         self.alerter = alerter
+        self.http = http or HttpClient()
+        self.watchers = watchers
+        self.system = system or SystemSampler()
+        batch_cfg = dash_cfg.get("batch", {})
+        self.batcher = StatsBatcher(batch_cfg) if batch_cfg.get("enabled") else None
+        spool_cfg = dash_cfg.get("spool", {})
+        self.spool = None
+        if state_dir is not None and spool_cfg.get("enabled", True):
+            self.spool = StatsSpool(
+                Path(state_dir) / "spool",
+                max_bytes=spool_cfg.get("max_bytes", 8 * 1024 * 1024),
+                segment_bytes=spool_cfg.get("segment_bytes", 256 * 1024),
+            )
+        self.drain_batch = spool_cfg.get("drain_batch", 30)
+        self._drain_bucket = TokenBucket(spool_cfg.get("drain_rate", 1.0), 1)
+        self._rejected = 0
 
     @property
     def configured(self) -> bool:
         return bool(self.url and self.api_key)
 
     def _collect_payload(self) -> dict:
-        # System stats
-        try:
-            system = get_system_stats()
-        except Exception as e:
-            log.warning("failed to collect system stats: %s", e)
-            system = {}
+        # System stats — latest sampler snapshot, no /proc reads here
+        system = self.system.snapshot
 
-        # Sensor readings
+        # Sensor readings — cached by the DHT11 sampler thread
         temp, humidity = self.dashboard.read_dht11()
 
-        # LED state
-        if self.dashboard._last_gateway_ok:
-            led_state = "green"
-        elif hasattr(self.health, '_alerted') and self.health._alerted:
-            led_state = "red"
-        else:
-            led_state = "yellow"
+        # Per-gateway state
+        targets = self.health.targets_snapshot()
 
-        # Matrix pattern
-        matrix_pattern = "smiley" if self.dashboard._last_gateway_ok else "x"
-
-        # Recent alerts from TelegramAlerter
+        # Recent alerts from the dispatcher
         alerts = []
-        for a in self.alerter._recent_alerts:
+        for a in self.alerter.recent_alerts:
             alerts.append({
                 "ts": a["ts"],
                 "message": a["message"],
             })
 
-        return {
+        payload = {
             "ts": int(time.time()),
             "machine": "clawpiscout",
             "gateway": {
                 "status": self.health.status,
                 "consecutive_ok": self.health.consecutive_ok,
                 "uptime_seconds": self.health.uptime_seconds,
+                "targets_up": sum(1 for t in targets if t["status"] == "up"),
+                "targets_total": len(targets),
+                "latency_ms": self.health.latency_summary(),
+                "targets": targets,
             },
             "system": {
                 "cpu_temp": system.get("cpu_temp", 0),
@@ -69,42 +111,174 @@ class StatsPusher:
                 "mem_total_mb": system.get("mem_total_mb", 0),
                 "mem_available_mb": system.get("mem_available_mb", 0),
                 "load_avg": system.get("load_avg", "0"),
+                "cpu": system.get("cpu"),
+                "net": system.get("net"),
+                "disk_io": system.get("disk_io"),
+                # min / max / mean / p95 of every sample since the last push
+                "window": self.system.window.take(),
             },
             "sensor": {
                 "temperature": temp,
                 "humidity": humidity,
+                "dht11": self.dashboard.sensor_stats,
             },
-            "dashboard": {
-                "health_score": self.dashboard._health_score,
-                "led_state": led_state,
-                "matrix_pattern": matrix_pattern,
-            },
+            "dashboard": self.dashboard.state(self.health.status),
             "alerts": alerts,
+            "alerter": self.alerter.stats,
+            "sampler": self.system.stats,
+            "http": self.http.stats,
         }
+        if self.watchers is not None:
+            payload["watchers"] = self.watchers.stats
+        if self.batcher is not None:
+            payload["pusher"] = self.batcher.stats
+        if self.spool is not None:
+            payload["spool"] = self.spool.stats
+        return payload
 
-    async def _push(self, payload: dict) -> bool:
+    @property
+    def stats(self) -> dict:
+        return {
+            "batch": self.batcher.stats if self.batcher is not None else None,
+            "spool": self.spool.stats if self.spool is not None else None,
+            "rejected": self._rejected,
+        }
+
+    @staticmethod
+    def _result(status: int) -> str:
+        if status == 200:
+            return SENT
+        # Server trouble or throttling — worth keeping for later
+        if status >= 500 or status == 429:
+            return UNDELIVERED
+        return REJECTED
+
+    async def _push(self, payload: dict) -> str:
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.url,
-                    json=payload,
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=15),
-                ) as resp:
-                    if resp.status == 200:
-                        log.debug("stats pushed successfully")
-                        return True
-                    else:
-                        body = await resp.text()
-                        log.warning("stats push failed (%d): %s", resp.status, body[:100])
-                        return False
+            async with self.http.post(
+                self.url,
+                json=payload,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=15),
+            ) as resp:
+                if resp.status == 200:
+                    log.debug("stats pushed successfully")
+                    return SENT
+                else:
+                    body = await resp.text()
+                    log.warning("stats push failed (%d): %s", resp.status, body[:100])
+                    return self._result(resp.status)
         except Exception as e:
             log.warning("stats push error: %s", e)
-            return False
+            return UNDELIVERED
+
+    async def _push_batch(self, batcher: StatsBatcher | None = None,
+                          backfill: bool = False) -> str:
+        """SENT, RESYNC, or what _result() makes of the failure."""
+        batcher = batcher or self.batcher
+        body, count = batcher.encode(backfill)
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "Content-Encoding": "gzip",
+        }
+        try:
+            async with self.http.post(
+                self.url,
+                data=body,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=15),
+            ) as resp:
+                text = await resp.text()
+                if resp.status == 409:
+                    # Samples stay pending and are resent in full next time
+                    log.info("dashboard asked for a full snapshot")
+                    batcher.resync()
+                    return RESYNC
+                if resp.status != 200:
+                    log.warning("stats batch push failed (%d): %s", resp.status, text[:100])
+                    return self._result(resp.status)
+        except Exception as e:
+            log.warning("stats batch push error: %s", e)
+            return UNDELIVERED
+
+        batcher.ack(count)
+        try:
+            if json.loads(text).get("resync"):
+                log.info("dashboard asked for a full snapshot")
+                batcher.resync()
+        except (ValueError, AttributeError):
+            pass
+        log.debug("stats batch pushed — %d samples, %d bytes", count, len(body))
+        return SENT
+
+    def _drop(self, count: int):
+        self._rejected += count
+        log.warning("dashboard rejected %d stats pushes — dropped", count)
+
+    async def _to_spool(self, payloads: list[dict]):
+        if self.spool is None or not payloads:
+            return
+        try:
+            await asyncio.to_thread(self.spool.append, payloads)
+            log.info("%d stats pushes spooled (%d pending)", len(payloads), len(self.spool))
+        except OSError as e:
+            log.error("stats spool write failed — %d pushes lost: %s", len(payloads), e)
+
+    async def _handle_batch(self, result: str):
+        """Spool or drop what the last live batch push left pending."""
+        if result == REJECTED:
+            self._drop(len(self.batcher.take()))
+        elif result == UNDELIVERED and self.spool is not None:
+            await self._to_spool(self.batcher.take())
+
+    async def _backfill(self):
+        """Replay spooled payloads oldest first, at most drain_batch this interval."""
+        if self.spool is None or not len(self.spool):
+            return
+        log.info("backfilling %d spooled stats pushes", len(self.spool))
+        chunk = self.batcher.size if self.batcher is not None else 1
+        remaining = self.drain_batch
+        while remaining > 0 and len(self.spool):
+            try:
+                payloads, cursor = await asyncio.to_thread(
+                    self.spool.peek, min(chunk, remaining)
+                )
+            except OSError as e:
+                log.error("stats spool read failed: %s", e)
+                return
+            if payloads:
+                await self._drain_bucket.acquire()
+                if self.batcher is None:
+                    result = await self._push({**payloads[0], "backfill": True})
+                else:
+                    # Own encoder per chunk: starts from a full sample, filters
+                    # alerts only within the chunk and leaves the live base alone
+                    replay = StatsBatcher({
+                        "size": len(payloads),
+                        "max_pending": len(payloads),
+                        "gzip_level": self.batcher.level,
+                    }, self.batcher.machine)
+                    for payload in payloads:
+                        replay.add(payload)
+                    result = await self._push_batch(replay, backfill=True)
+                if result in (UNDELIVERED, RESYNC):
+                    return
+                if result == REJECTED:
+                    # Retrying won't help — skip it rather than block the spool
+                    self._drop(len(payloads))
+            try:
+                await asyncio.to_thread(self.spool.ack, cursor)
+            except OSError as e:
+                log.error("stats spool cursor write failed: %s", e)
+                return
+            remaining -= max(len(payloads), 1)
+        if not len(self.spool):
+            log.info("stats spool drained")
 
     async def run(self, stop: asyncio.Event):
         if not self.configured:
@@ -121,9 +295,27 @@ class StatsPusher:
         except asyncio.TimeoutError:
             pass
 
+        if self.spool is not None:
+            await asyncio.to_thread(self.spool.load)
+
         while not stop.is_set():
             payload = self._collect_payload()
-            await self._push(payload)
+            if self.batcher is None:
+                result = await self._push(payload)
+                if result == SENT:
+                    await self._backfill()
+                elif result == UNDELIVERED:
+                    await self._to_spool([payload])
+                else:
+                    self._drop(1)
+            else:
+                self.batcher.add(payload)
+                if self.batcher.ready:
+                    result = await self._push_batch()
+                    if result == SENT:
+                        await self._backfill()
+                    elif result != RESYNC:
+                        await self._handle_batch(result)
 
             try:
                 await asyncio.wait_for(stop.wait(), timeout=self.interval)
@@ -131,4 +323,12 @@ class StatsPusher:
             except asyncio.TimeoutError:
                 pass
 
+        if self.batcher is not None and len(self.batcher):
+            result = await self._push_batch()
+            if result == RESYNC:
+                # No next push to resend in — go again now, as a full batch
+                result = await self._push_batch()
+            if result != SENT:
+                # A 409 even for a full batch — the dashboard won't take them
+                await self._handle_batch(REJECTED if result == RESYNC else result)
         log.info("stats pusher stopped")
@@ -0,0 +1,180 @@
+"""Stats spool — payloads that couldn't be pushed, kept on disk for backfill.
+
+The spool is a directory of append-only JSON-lines segments, one payload
+per line, each segment named after the sequence number of its first
+line. A new segment is started once the current one reaches
+segment_bytes. When the spool grows past max_bytes the oldest segments
+are deleted, so an outage of any length costs a bounded amount of
+SD card and loses the oldest data first.
+
+A small cursor file records how far the backfill has got (segment,
+byte offset, sequence number). peek() reads from the cursor without
+moving it, and ack() moves it once the dashboard has accepted what was
+read, deleting segments that are fully sent. A torn last line from a
+crash is cut off on load.
+
+All methods do blocking file I/O — call them via asyncio.to_thread.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+
+from scout.storage import atomic_write
+
+log = logging.getLogger("scout.stats_spool")
+
+CURSOR = "cursor.json"
+
+
+class StatsSpool:
+    def __init__(self, directory: Path, max_bytes: int = 8 * 1024 * 1024,
+                 segment_bytes: int = 256 * 1024):
+        self.dir = Path(directory)
+        self.max_bytes = max_bytes
+        # At least two segments fit, so rotation can always free space
+        self.segment_bytes = min(segment_bytes, max_bytes // 2)
+        self._segments: list[list[int]] = []   # [first_seq, size], oldest first
+        self._cursor = (0, 0, 0)               # (segment first_seq, offset, seq)
+        self._next_seq = 0
+        self._dropped = 0
+        self._loaded = False
+
+    def __len__(self) -> int:
+        return self._next_seq - self._cursor[2]
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "pending": len(self),
+            "bytes": sum(size for _, size in self._segments),
+            "segments": len(self._segments),
+            "dropped": self._dropped,
+        }
+
+    def _path(self, first: int) -> Path:
+        return self.dir / f"{first:010d}.jsonl"
+
+    def load(self):
+        """Scan the spool directory. Safe to call more than once."""
+        if self._loaded:
+            return
+        self._loaded = True
+        self.dir.mkdir(parents=True, exist_ok=True)
+        firsts = sorted(int(p.stem) for p in self.dir.glob("*.jsonl") if p.stem.isdigit())
+        self._segments = [[first, self._path(first).stat().st_size] for first in firsts]
+
+        try:
+            cursor = json.loads((self.dir / CURSOR).read_text())
+            self._cursor = (cursor["segment"], cursor["offset"], cursor["seq"])
+        except (OSError, ValueError, KeyError, TypeError):
+            self._cursor = (firsts[0], 0, firsts[0]) if firsts else (0, 0, 0)
+
+        if not self._segments:
+            self._next_seq = self._cursor[2]
+            return
+        last = self._segments[-1]
+        data = self._path(last[0]).read_bytes()
+        cut = data.rfind(b"\n") + 1
+        if cut < len(data):
+            log.warning("stats spool: cut torn line from %s", self._path(last[0]).name)
+            os.truncate(self._path(last[0]), cut)
+            last[1] = cut
+        self._next_seq = last[0] + data.count(b"\n", 0, cut)
+        if self._cursor[0] < self._segments[0][0]:
+            first = self._segments[0][0]
+            self._cursor = (first, 0, first)
+        if len(self):
+            log.info("stats spool: %d unsent pushes from previous run", len(self))
+
+    def append(self, payloads: list[dict]):
+        """Persist payloads for a later backfill, dropping the oldest if full."""
+        if not self._loaded:
+            self.load()
+        for payload in payloads:
+            line = json.dumps(payload, separators=(",", ":")).encode() + b"\n"
+            if not self._segments or (
+                self._segments[-1][1] > 0
+                and self._segments[-1][1] + len(line) > self.segment_bytes
+            ):
+                self._segments.append([self._next_seq, 0])
+            segment = self._segments[-1]
+            with open(self._path(segment[0]), "ab") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            segment[1] += len(line)
+            self._next_seq += 1
+        self._enforce_limit()
+
+    def _enforce_limit(self):
+        total = sum(size for _, size in self._segments)
+        dropped = 0
+        while total > self.max_bytes and len(self._segments) > 1:
+            first, size = self._segments.pop(0)
+            self._path(first).unlink(missing_ok=True)
+            total -= size
+            start = self._segments[0][0]
+            if self._cursor[0] == first:
+                dropped += start - self._cursor[2]
+                self._cursor = (start, 0, start)
+        if dropped:
+            self._dropped += dropped
+            log.warning("stats spool full — dropped %d oldest pushes", dropped)
+            self._write_cursor()
+
+    def peek(self, limit: int) -> tuple[list[dict], tuple[int, int, int]]:
+        """Up to `limit` payloads from the cursor on, and the position after them."""
+        if not self._loaded:
+            self.load()
+        out: list[dict] = []
+        first, offset, seq = self._cursor
+        index = next((i for i, s in enumerate(self._segments) if s[0] == first), None)
+        if index is None:
+            return out, self._cursor
+        torn = 0
+        while len(out) < limit and seq < self._next_seq:
+            first, size = self._segments[index]
+            if offset >= size:
+                if index + 1 >= len(self._segments):
+                    break
+                index += 1
+                first, offset = self._segments[index][0], 0
+                continue
+            with open(self._path(first), "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    offset += len(line)
+                    seq += 1
+                    try:
+                        out.append(json.loads(line))
+                    except ValueError:
+                        torn += 1
+                    if len(out) >= limit:
+                        break
+        if torn:
+            log.warning("stats spool: skipped %d unreadable lines", torn)
+        return out, (first, offset, seq)
+
+    def ack(self, cursor: tuple[int, int, int]):
+        """Everything before `cursor` (as returned by peek) has been delivered."""
+        self._cursor = cursor
+        if not len(self):
+            # Fully drained — start afresh instead of keeping a read-out tail
+            for first, _ in self._segments:
+                self._path(first).unlink(missing_ok=True)
+            self._segments = []
+            self._cursor = (self._next_seq, 0, self._next_seq)
+        else:
+            while len(self._segments) > 1 and self._segments[0][0] < cursor[0]:
+                first, _ = self._segments.pop(0)
+                self._path(first).unlink(missing_ok=True)
+        self._write_cursor()
+
+    def _write_cursor(self):
+        first, offset, seq = self._cursor
+        atomic_write(
+            self.dir / CURSOR,
+            json.dumps({"segment": first, "offset": offset, "seq": seq}).encode(),
+        )
@@ -0,0 +1,45 @@
+"""Local storage — where the daemon keeps state between restarts."""
+
+import os
+import re
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+
+def data_dir(config: dict, *parts: str) -> Path:
+    """Return (and create) a directory under storage.data_dir.
+
+    Relative paths are resolved against the project root, next to config/.
+    """
+    path = Path(config.get("storage", {}).get("data_dir", "data"))
+    if not path.is_absolute():
+        path = ROOT / path
+    path = path.joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def safe_name(name: str) -> str:
+    """Turn a target name into something safe to use as a file name."""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name) or "_"
+
+
+def atomic_write(path: Path, data: bytes):
+    """Replace path with data so readers only ever see the old or new file.
+
+    Writes a temp file in the same directory, fsyncs it, renames it over the
+    target and fsyncs the directory so the rename itself is durable.
+    """
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    dir_fd = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
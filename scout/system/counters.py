@@ -0,0 +1,172 @@
+"""Rate counters — CPU, network and disk I/O from consecutive /proc samples.
+
+Each counter keeps its file descriptor open and the previous raw values
+in a flat array('Q') sized once at startup (one slot per core, interface
+or device field), so a sample is one pread, a parse of the relevant
+lines and an in-place subtraction — O(cores + interfaces + devices).
+
+The first sample only primes the counters; rates are reported from the
+second one on. Counters that go backwards (interface re-created, wrap)
+are treated as zero for that interval.
+"""
+
+import logging
+import os
+from array import array
+
+log = logging.getLogger("scout.system")
+
+# /proc/stat cpu fields summed into "total": user nice system idle iowait irq softirq steal
+_CPU_FIELDS = 8
+_IDLE, _IOWAIT = 3, 4
+
+# /proc/diskstats fields kept per device (0-based after the device name)
+_DISK_FIELDS = (0, 2, 4, 6, 9)   # reads, sectors read, writes, sectors written, ms doing I/O
+
+
+def _delta(cur: int, prev: int) -> int:
+    return cur - prev if cur >= prev else 0
+
+
+class _ProcCounter:
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+        try:
+            self._fd = os.open(path, os.O_RDONLY)
+        except OSError as e:
+            log.info("%s unavailable: %s", path, e)
+            self._fd = None
+        self._primed = False
+        self._prev_at = 0.0
+
+    def _read(self) -> bytes:
+        return os.pread(self._fd, self.size, 0)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class CpuCounters(_ProcCounter):
+    """Busy and iowait percentages, overall and per core, from /proc/stat."""
+
+    def __init__(self):
+        self.cores = os.cpu_count() or 1
+        # Only the cpu lines are needed and they come first
+        super().__init__("/proc/stat", 160 * (self.cores + 2))
+        rows = self.cores + 1
+        self._total = array("Q", bytes(8 * rows))
+        self._idle = array("Q", bytes(8 * rows))
+        self._iowait = array("Q", bytes(8 * rows))
+
+    def sample(self, now: float) -> dict | None:
+        if self._fd is None:
+            return None
+        busy = []
+        iowait_pct = 0.0
+        row = 0
+        for line in self._read().split(b"\n"):
+            if not line.startswith(b"cpu") or row > self.cores:
+                break
+            fields = line.split()[1:_CPU_FIELDS + 1]
+            total = sum(int(f) for f in fields)
+            idle = int(fields[_IDLE])
+            iowait = int(fields[_IOWAIT])
+            d_total = _delta(total, self._total[row])
+            d_idle = _delta(idle, self._idle[row])
+            d_iowait = _delta(iowait, self._iowait[row])
+            self._total[row], self._idle[row], self._iowait[row] = total, idle, iowait
+            pct = (d_total - d_idle - d_iowait) / d_total * 100 if d_total else 0.0
+            if row == 0:
+                iowait_pct = d_iowait / d_total * 100 if d_total else 0.0
+            busy.append(round(pct, 1))
+            row += 1
+        if not self._primed:
+            self._primed = True
+            return None
+        return {"total_pct": busy[0], "iowait_pct": round(iowait_pct, 1), "cores_pct": busy[1:]}
+
+
+class NetCounters(_ProcCounter):
+    """Receive / transmit bytes per second for the configured interfaces."""
+
+    def __init__(self, interfaces: list[str]):
+        super().__init__("/proc/net/dev", 16384)
+        self.interfaces = [i.encode() for i in interfaces]
+        self._index = {name: n for n, name in enumerate(self.interfaces)}
+        self._prev = array("Q", bytes(8 * 2 * len(interfaces)))
+        self._seen = bytearray(len(interfaces))
+
+    def sample(self, now: float) -> dict | None:
+        if self._fd is None or not self.interfaces:
+            return None
+        elapsed = now - self._prev_at
+        self._prev_at = now
+        out = {}
+        for line in self._read().split(b"\n")[2:]:
+            name, _, rest = line.partition(b":")
+            n = self._index.get(name.strip())
+            if n is None:
+                continue
+            fields = rest.split()
+            rx, tx = int(fields[0]), int(fields[8])
+            if self._primed and self._seen[n] and elapsed > 0:
+                out[name.strip().decode()] = {
+                    "rx_bps": round(_delta(rx, self._prev[2 * n]) / elapsed),
+                    "tx_bps": round(_delta(tx, self._prev[2 * n + 1]) / elapsed),
+                }
+            self._prev[2 * n], self._prev[2 * n + 1] = rx, tx
+            self._seen[n] = 1
+        if not self._primed:
+            self._primed = True
+            return None
+        return out
+
+
+class DiskCounters(_ProcCounter):
+    """Throughput, IOPS and busy time for the configured block devices."""
+
+    def __init__(self, devices: list[str]):
+        super().__init__("/proc/diskstats", 32768)
+        self.devices = [d.encode() for d in devices]
+        self._index = {name: n for n, name in enumerate(self.devices)}
+        width = len(_DISK_FIELDS)
+        self._prev = array("Q", bytes(8 * width * len(devices)))
+        self._seen = bytearray(len(devices))
+
+    def sample(self, now: float) -> dict | None:
+        if self._fd is None or not self.devices:
+            return None
+        elapsed = now - self._prev_at
+        self._prev_at = now
+        width = len(_DISK_FIELDS)
+        out = {}
+        for line in self._read().split(b"\n"):
+            # Cheap look at the device name before splitting the whole line
+            head = line.split(None, 3)
+            n = self._index.get(head[2]) if len(head) == 4 else None
+            if n is None:
+                continue
+            fields = line.split()
+            base = n * width
+            d = []
+            for k, f in enumerate(_DISK_FIELDS):
+                value = int(fields[3 + f])
+                d.append(_delta(value, self._prev[base + k]))
+                self._prev[base + k] = value
+            if self._primed and self._seen[n] and elapsed > 0:
+                reads, sectors_r, writes, sectors_w, busy_ms = d
+                out[fields[2].decode()] = {
+                    "read_kbps": round(sectors_r * 512 / 1024 / elapsed, 1),
+                    "write_kbps": round(sectors_w * 512 / 1024 / elapsed, 1),
+                    "reads_ps": round(reads / elapsed, 1),
+                    "writes_ps": round(writes / elapsed, 1),
+                    "util_pct": round(min(100.0, busy_ms / (elapsed * 10)), 1),
+                }
+            self._seen[n] = 1
+        if not self._primed:
+            self._primed = True
+            return None
+        return out
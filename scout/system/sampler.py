@@ -0,0 +1,186 @@
+"""System sampler — one reader of /proc for the whole daemon.
+
+The sampler opens /proc/meminfo, /proc/loadavg and the thermal zone once
+and re-reads them with pread() at offset 0 (procfs regenerates the
+contents on every read from the start), so a sample costs a few syscalls
+and no open/close or Python file objects. Only the fields we report are
+parsed: the first three lines of meminfo and the first three loadavg
+fields.
+
+CPU, network and disk I/O rates come from the counters in counters.py,
+derived from the previous sample's raw values.
+
+Every `interval` seconds the result is published as a new read-only
+mapping. The briefing, the stats pusher and the LCD read `snapshot` and
+never touch /proc themselves. Each sample's numeric values are also
+recorded into a MetricWindow, so a push can report min / max / mean / p95
+over everything sampled since the last one rather than a single point.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import platform
+import time
+from collections import deque
+from types import MappingProxyType
+
+from scout.system.counters import CpuCounters, DiskCounters, NetCounters
+from scout.system.window import MetricWindow
+
+log = logging.getLogger("scout.system")
+
+THERMAL_ZONE = "/sys/class/thermal/thermal_zone0/temp"
+
+
+def _open(path: str) -> int | None:
+    try:
+        return os.open(path, os.O_RDONLY)
+    except OSError as e:
+        log.info("%s unavailable: %s", path, e)
+        return None
+
+
+class SystemSampler:
+    def __init__(self, config: dict | None = None):
+        config = config or {}
+        self.interval = config.get("sample_interval", 1)
+        self.disk_path = config.get("disk_path", "/")
+        self._hostname = platform.node()
+        self._meminfo = _open("/proc/meminfo")
+        self._loadavg = _open("/proc/loadavg")
+        self._thermal = _open(config.get("thermal_zone", THERMAL_ZONE))
+        self._cpu = CpuCounters()
+        self._interfaces = config.get("interfaces", ["tailscale0"])
+        self._disks = config.get("disks", ["mmcblk0"])
+        self._net = NetCounters(self._interfaces)
+        self._disk = DiskCounters(self._disks)
+        names = ["cpu_temp", "load_1m", "mem_available_mb", "cpu_pct", "iowait_pct"]
+        for iface in self._interfaces:
+            names += [f"{iface}_rx_bps", f"{iface}_tx_bps"]
+        for dev in self._disks:
+            names += [f"{dev}_read_kbps", f"{dev}_write_kbps", f"{dev}_util_pct"]
+        self.window = MetricWindow(names, config.get("window_samples", 600))
+        self._running = False
+        self._samples = 0
+        self._errors = 0
+        self._cost_us: deque[float] = deque(maxlen=120)
+        self._snapshot = MappingProxyType({})
+        self._sampled_at = 0.0
+        self.sample()
+
+    @property
+    def snapshot(self) -> MappingProxyType:
+        """Latest published sample (read-only)."""
+        if not self._running and time.monotonic() - self._sampled_at >= self.interval:
+            # Nobody is driving run() — sample on demand instead of going stale
+            self.sample()
+        return self._snapshot
+
+    @property
+    def stats(self) -> dict:
+        ordered = sorted(self._cost_us)
+        return {
+            "samples": self._samples,
+            "errors": self._errors,
+            "interval": self.interval,
+            "sample_us": {
+                "p50": round(ordered[len(ordered) // 2], 1) if ordered else None,
+                "max": round(ordered[-1], 1) if ordered else None,
+            },
+        }
+
+    def _read_meminfo(self) -> tuple[int, int]:
+        if self._meminfo is None:
+            return 0, 0
+        total = available = 0
+        # MemTotal and MemAvailable are lines 1 and 3
+        for line in os.pread(self._meminfo, 256, 0).split(b"\n", 3)[:3]:
+            if line.startswith(b"MemTotal:"):
+                total = int(line.split()[1]) // 1024
+            elif line.startswith(b"MemAvailable:"):
+                available = int(line.split()[1]) // 1024
+        return total, available
+
+    def _read_loadavg(self) -> str:
+        if self._loadavg is None:
+            return "0"
+        return " / ".join(os.pread(self._loadavg, 64, 0).decode().split()[:3])
+
+    def _read_temp(self) -> float:
+        if self._thermal is None:
+            return 0
+        return int(os.pread(self._thermal, 16, 0)) / 1000
+
+    def sample(self):
+        started = time.perf_counter_ns()
+        now = time.monotonic()
+        try:
+            mem_total, mem_available = self._read_meminfo()
+            disk = os.statvfs(self.disk_path)
+            total = disk.f_blocks * disk.f_frsize
+            free = disk.f_bavail * disk.f_frsize
+            used = total - disk.f_bfree * disk.f_frsize
+            self._snapshot = MappingProxyType({
+                "ts": time.time(),
+                "disk_used_pct": round(used / total * 100, 1) if total else 0,
+                "disk_free_gb": round(free / (1024**3), 1),
+                "mem_total_mb": mem_total,
+                "mem_available_mb": mem_available,
+                "load_avg": self._read_loadavg(),
+                "cpu_temp": self._read_temp(),
+                "hostname": self._hostname,
+                "cpu": self._cpu.sample(now),
+                "net": self._net.sample(now),
+                "disk_io": self._disk.sample(now),
+            })
+            self.window.record(self._window_values(self._snapshot))
+            self._samples += 1
+        except (OSError, ValueError) as e:
+            self._errors += 1
+            log.warning("system sample failed: %s", e)
+        self._sampled_at = time.monotonic()
+        self._cost_us.append((time.perf_counter_ns() - started) / 1000)
+
+    def _window_values(self, snap) -> list[float]:
+        nan = math.nan
+        cpu = snap["cpu"] or {}
+        net = snap["net"] or {}
+        disk = snap["disk_io"] or {}
+        values = [
+            snap["cpu_temp"],
+            float(snap["load_avg"].split(" / ")[0]),
+            snap["mem_available_mb"],
+            cpu.get("total_pct", nan),
+            cpu.get("iowait_pct", nan),
+        ]
+        for iface in self._interfaces:
+            rate = net.get(iface, {})
+            values += [rate.get("rx_bps", nan), rate.get("tx_bps", nan)]
+        for dev in self._disks:
+            io = disk.get(dev, {})
+            values += [io.get("read_kbps", nan), io.get("write_kbps", nan),
+                       io.get("util_pct", nan)]
+        return values
+
+    async def run(self, stop: asyncio.Event):
+        self._running = True
+        log.info("system sampler started — every %ss", self.interval)
+        try:
+            while not stop.is_set():
+                self.sample()
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=self.interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._running = False
+
+    def close(self):
+        for fd in (self._meminfo, self._loadavg, self._thermal):
+            if fd is not None:
+                os.close(fd)
+        self._meminfo = self._loadavg = self._thermal = None
+        for counter in (self._cpu, self._net, self._disk):
+            counter.close()
@@ -0,0 +1,68 @@
+"""Metric window — fixed-size sample buffers between two stats pushes.
+
+One array('d') column per metric, allocated once with `capacity` slots
+and written as a ring, so recording a sample is a handful of float
+stores and memory never grows however long a push is delayed. Missing
+values are stored as NaN and left out of the summary.
+
+The stats pusher calls take() once per push to get min / max / mean /
+p95 per metric over the samples since the previous push.
+"""
+
+import math
+import time
+from array import array
+
+
+class MetricWindow:
+    def __init__(self, names: list[str], capacity: int = 600):
+        self.names = list(names)
+        self.capacity = capacity
+        self._columns = [array("d", bytes(8 * capacity)) for _ in self.names]
+        self._head = 0
+        self._count = 0
+        self._since = time.time()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def record(self, values: list[float]):
+        """Store one sample; values line up with names (NaN = missing)."""
+        head = self._head
+        for column, value in zip(self._columns, values):
+            column[head] = value
+        self._head = (head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def summary(self) -> dict:
+        metrics = {}
+        n = self._count
+        start = (self._head - n) % self.capacity
+        for name, column in zip(self.names, self._columns):
+            if start + n <= self.capacity:
+                values = column[start:start + n]
+            else:
+                values = column[start:] + column[:self._head]
+            ordered = sorted(v for v in values if not math.isnan(v))
+            if not ordered:
+                continue
+            p95 = ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)]
+            metrics[name] = {
+                "min": round(ordered[0], 2),
+                "max": round(ordered[-1], 2),
+                "mean": round(sum(ordered) / len(ordered), 2),
+                "p95": round(p95, 2),
+            }
+        return {
+            "samples": n,
+            "seconds": round(time.time() - self._since, 1),
+            "metrics": metrics,
+        }
+
+    def take(self) -> dict:
+        """Summary of the current window, then start a new one."""
+        summary = self.summary()
+        self._head = self._count = 0
+        self._since = time.time()
+        return summary
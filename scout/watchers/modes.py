@@ -0,0 +1,136 @@
+"""Watcher modes — what part of a response a target's hash covers.
+
+    text         hash the body, after optional regex strips
+    json         parse, keep only the selected subtrees, drop ignored keys,
+                 and hash the canonical (sorted-key) serialization
+    status_code  hash only the HTTP status; the body is never read
+
+Selectors and regexes are compiled once per target when the watcher starts.
+Selector syntax is a dotted path with list indexes or wildcards, e.g.
+`version`, `data.items[*].sha`, `releases[0].tag_name`, `*.status`.
+"""
+
+import hashlib
+import json
+import re
+
+MODES = ("text", "json", "status_code")
+
+_STEP = re.compile(r"([^.\[\]]+)|\[(\*|-?\d+)\]")
+
+
+def compile_selector(path: str) -> tuple:
+    """Turn `a.b[0].c[*]` into a tuple of steps: keys, ints, or None for wildcard."""
+    steps = []
+    for part in path.split("."):
+        if not part:
+            raise ValueError(f"empty segment in selector {path!r}")
+        pos = 0
+        for m in _STEP.finditer(part):
+            if m.start() != pos:
+                raise ValueError(f"bad selector {path!r}")
+            key, index = m.groups()
+            if key is not None:
+                steps.append(None if key == "*" else key)
+            else:
+                steps.append(None if index == "*" else int(index))
+            pos = m.end()
+        if pos != len(part):
+            raise ValueError(f"bad selector {path!r}")
+    return tuple(steps)
+
+
+def select(doc, steps: tuple) -> list:
+    """All values reached by following steps from doc (missing paths yield nothing)."""
+    nodes = [doc]
+    for step in steps:
+        nxt = []
+        for node in nodes:
+            if step is None:
+                if isinstance(node, dict):
+                    nxt.extend(node.values())
+                elif isinstance(node, list):
+                    nxt.extend(node)
+            elif isinstance(step, int):
+                if isinstance(node, list) and -len(node) <= step < len(node):
+                    nxt.append(node[step])
+            elif isinstance(node, dict) and step in node:
+                nxt.append(node[step])
+        nodes = nxt
+    return nodes
+
+
+def _drop_keys(node, keys: frozenset):
+    if isinstance(node, dict):
+        return {k: _drop_keys(v, keys) for k, v in node.items() if k not in keys}
+    if isinstance(node, list):
+        return [_drop_keys(v, keys) for v in node]
+    return node
+
+
+class TargetMode:
+    """A target's compiled normalization pipeline."""
+
+    def __init__(self, target: dict):
+        self.type = target.get("type", "text")
+        if self.type not in MODES:
+            raise ValueError(f"unknown watcher type {self.type!r} — expected one of {MODES}")
+        self.selectors = [(s, compile_selector(s)) for s in target.get("select", [])]
+        self.ignore_keys = frozenset(target.get("ignore_keys", []))
+        self.strip = [re.compile(p) for p in target.get("strip", [])]
+
+    @property
+    def reads_body(self) -> bool:
+        return self.type != "status_code"
+
+    @property
+    def streaming(self) -> bool:
+        """Whether the raw body can be hashed chunk by chunk as it arrives."""
+        return self.type == "text" and not self.strip
+
+    def _transform(self, body: bytes):
+        if self.type != "json":
+            return body.decode("utf-8", errors="replace")
+        doc = json.loads(body)
+        if self.selectors:
+            doc = {path: select(doc, steps) for path, steps in self.selectors}
+        if self.ignore_keys:
+            doc = _drop_keys(doc, self.ignore_keys)
+        return doc
+
+    def _serialize(self, doc, pretty: bool) -> bytes:
+        if self.type == "json":
+            text = json.dumps(
+                doc,
+                sort_keys=True,
+                ensure_ascii=False,
+                indent=1 if pretty else None,
+                separators=(",", ": ") if pretty else (",", ":"),
+            )
+        else:
+            text = doc
+        for pattern in self.strip:
+            text = pattern.sub("", text)
+        return text.encode()
+
+    def normalize(self, body: bytes) -> bytes:
+        """Bytes to hash for a fully read body."""
+        return self._serialize(self._transform(body), pretty=False)
+
+    def digest(self, body: bytes) -> str:
+        return hashlib.sha256(self.normalize(body)).hexdigest()[:16]
+
+    def digest_and_snapshot(self, body: bytes) -> tuple[str, bytes]:
+        """Hash plus a line-oriented rendering for diffs, parsing only once.
+
+        JSON is pretty-printed so diffs show the changed fields line by line.
+        """
+        doc = self._transform(body)
+        digest = hashlib.sha256(self._serialize(doc, pretty=False)).hexdigest()[:16]
+        if self.type == "json":
+            return digest, self._serialize(doc, pretty=True)
+        return digest, self._serialize(doc, pretty=False)
+
+    @staticmethod
+    def status_digest(status: int) -> str:
+        return hashlib.sha256(str(status).encode()).hexdigest()[:16]
@@ -0,0 +1,63 @@
+"""Timer heap — one min-heap of due times for all watcher targets.
+
+Rescheduling pushes a new entry (O(log n)); superseded entries are left in
+place and skipped when they surface, so there is no O(n) removal. The
+watcher loop sleeps until the earliest due time instead of keeping one
+sleeping task per target.
+"""
+
+import heapq
+import itertools
+import time
+
+
+class TimerHeap:
+    def __init__(self):
+        self._heap: list[tuple[float, int, str]] = []
+        self._due: dict[str, float] = {}
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def schedule(self, name: str, due: float):
+        self._due[name] = due
+        heapq.heappush(self._heap, (due, next(self._seq), name))
+        # Keep stale entries from outgrowing the live ones
+        if len(self._heap) > 2 * len(self._due) + 64:
+            self._compact()
+
+    def cancel(self, name: str):
+        self._due.pop(name, None)
+
+    def due_at(self, name: str) -> float | None:
+        return self._due.get(name)
+
+    def _is_live(self, entry: tuple[float, int, str]) -> bool:
+        return self._due.get(entry[2]) == entry[0]
+
+    def next_due(self) -> float | None:
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float) -> list[tuple[str, float]]:
+        """Remove and return (name, due) for every target due by now."""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if self._is_live(entry):
+                del self._due[entry[2]]
+                due.append((entry[2], entry[0]))
+        return due
+
+    def queue(self, limit: int = 10, now: float | None = None) -> list[dict]:
+        """The next `limit` targets in due order, for debugging."""
+        if now is None:
+            now = time.monotonic()
+        upcoming = heapq.nsmallest(limit, ((d, n) for n, d in self._due.items()))
+        return [{"name": n, "due_in": round(d - now, 1)} for d, n in upcoming]
+
+    def _compact(self):
+        self._heap = [(d, next(self._seq), n) for n, d in self._due.items()]
+        heapq.heapify(self._heap)
@@ -0,0 +1,233 @@
+"""Snapshot store — last N versions of each watcher target, compressed and deduplicated.
+
+Layout under the store directory:
+
+    chunks/ab/abcdef….z     zlib-compressed chunk, named by its SHA-256
+    targets/<name>.json     snapshot index for one target, oldest first
+
+Content is split into content-defined chunks at line boundaries: a chunk
+ends after a line whose CRC falls on a boundary mask (or at MAX_CHUNK), so
+an edit only changes the chunks around it and near-identical versions share
+almost all of their chunks. Lines longer than LONG_LINE (minified HTML or
+JSON) are also cut inside, where a rolling gear hash of the last 64 bytes
+hits a boundary, so an insertion there doesn't shift every later chunk.
+
+Each target keeps at most `keep` snapshots and `max_bytes` of compressed
+chunk data; older snapshots are evicted. Chunks are reference-counted in
+memory and deleted when their last snapshot goes. The counts are built
+from the indexes on first use, which is also when chunks left orphaned
+by a crash are swept.
+
+All methods do blocking file I/O — call them via asyncio.to_thread.
+"""
+
+import difflib
+import hashlib
+import html
+import json
+import logging
+import threading
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+
+from scout.storage import atomic_write, safe_name
+
+log = logging.getLogger("scout.watchers.snapshots")
+
+BOUNDARY_MASK = 0x1F          # ~1 boundary every 32 lines
+MAX_CHUNK = 16 * 1024
+LONG_LINE = 4 * 1024          # longer lines are cut inside too
+MIN_PIECE = 2 * 1024          # no in-line cut closer than this to the last one
+GEAR_MASK = 0xFFF << 52       # top 12 bits → ~1 cut per 4 KiB past MIN_PIECE
+GEAR = tuple(int.from_bytes(hashlib.sha256(bytes([i])).digest()[:8], "little")
+             for i in range(256))
+_U64 = (1 << 64) - 1
+
+
+def _line_cuts(line: bytes) -> list[int]:
+    """Content-defined cut offsets inside one long line (gear rolling hash).
+
+    The hash only depends on the last 64 bytes, so hashing starts 64 bytes
+    before the earliest allowed cut. A piece with no boundary is cut at
+    MAX_CHUNK.
+    """
+    cuts = []
+    last = 0
+    end = len(line)
+    while end - last > MIN_PIECE:
+        limit = min(end, last + MAX_CHUNK)
+        h = 0
+        for b in line[last + MIN_PIECE - 64:last + MIN_PIECE]:
+            h = ((h << 1) + GEAR[b]) & _U64
+        cut = limit
+        for i, b in enumerate(line[last + MIN_PIECE:limit], last + MIN_PIECE):
+            h = ((h << 1) + GEAR[b]) & _U64
+            if not h & GEAR_MASK:
+                cut = i + 1
+                break
+        if cut == end:
+            break
+        cuts.append(cut)
+        last = cut
+    return cuts
+
+
+def chunk_content(data: bytes) -> list[bytes]:
+    chunks = []
+    start = 0
+    pos = 0
+    for line in data.splitlines(keepends=True):
+        if len(line) > LONG_LINE:
+            if pos > start:
+                chunks.append(data[start:pos])
+                start = pos
+            for cut in _line_cuts(line):
+                chunks.append(data[start:pos + cut])
+                start = pos + cut
+        pos += len(line)
+        if (zlib.crc32(line) & BOUNDARY_MASK) == 0 or pos - start >= MAX_CHUNK:
+            chunks.append(data[start:pos])
+            start = pos
+    if start < len(data):
+        chunks.append(data[start:])
+    return chunks
+
+
+def render_diff(old: bytes, new: bytes, max_lines: int = 20, max_chars: int = 1500) -> str:
+    """Bounded unified diff, HTML-escaped for a Telegram <pre> block."""
+    lines = list(difflib.unified_diff(
+        old.decode("utf-8", errors="replace").splitlines(),
+        new.decode("utf-8", errors="replace").splitlines(),
+        lineterm="",
+        n=1,
+    ))[2:]  # drop the ---/+++ header
+    shown = []
+    size = 0
+    for line in lines:
+        if len(shown) >= max_lines or size + len(line) > max_chars:
+            break
+        shown.append(line[:200])
+        size += len(shown[-1]) + 1
+    text = "\n".join(shown)
+    if len(shown) < len(lines):
+        text += f"\n… {len(lines) - len(shown)} more lines"
+    return html.escape(text, quote=False)
+
+
+class SnapshotStore:
+    def __init__(self, path: Path, keep: int = 5, max_bytes: int = 2 * 1024 * 1024):
+        self.path = Path(path)
+        self.keep = keep
+        self.max_bytes = max_bytes
+        self._chunks = self.path / "chunks"
+        self._targets = self.path / "targets"
+        self._chunks.mkdir(parents=True, exist_ok=True)
+        self._targets.mkdir(parents=True, exist_ok=True)
+        # Serializes put/GC so a sweep can't delete a chunk mid-write
+        self._lock = threading.Lock()
+        self._refs: Counter | None = None
+
+    def _index_path(self, name: str) -> Path:
+        return self._targets / f"{safe_name(name)}.json"
+
+    def _chunk_path(self, digest: str) -> Path:
+        return self._chunks / digest[:2] / f"{digest}.z"
+
+    def _load_index(self, name: str) -> list[dict]:
+        try:
+            return json.loads(self._index_path(name).read_text())
+        except (OSError, ValueError):
+            return []
+
+    def put(self, name: str, content_hash: str, data: bytes):
+        with self._lock:
+            if self._refs is None:
+                self._load_refs()
+            index = self._load_index(name)
+            if index and index[-1]["hash"] == content_hash:
+                return
+
+            refs = []
+            for chunk in chunk_content(data):
+                digest = hashlib.sha256(chunk).hexdigest()
+                cpath = self._chunk_path(digest)
+                if cpath.exists():
+                    csize = cpath.stat().st_size
+                else:
+                    packed = zlib.compress(chunk, 6)
+                    cpath.parent.mkdir(exist_ok=True)
+                    atomic_write(cpath, packed)
+                    csize = len(packed)
+                refs.append([digest, csize])
+
+            index.append({"hash": content_hash, "ts": int(time.time()), "size": len(data),
+                          "chunks": refs})
+            evicted = self._evict(index)
+            atomic_write(self._index_path(name), json.dumps(index).encode())
+            # Count the new snapshot before releasing old ones — they share chunks
+            self._refs.update(d for d, _ in refs)
+            for snap in evicted:
+                self._release(snap)
+
+    def _evict(self, index: list[dict]) -> list[dict]:
+        """Drop oldest snapshots beyond keep or max_bytes (always keeps the newest)."""
+        evicted = []
+        while len(index) > 1:
+            unique = {d: s for snap in index for d, s in snap["chunks"]}
+            if len(index) <= self.keep and sum(unique.values()) <= self.max_bytes:
+                break
+            evicted.append(index.pop(0))
+        return evicted
+
+    def _release(self, snap: dict):
+        removed = 0
+        for digest, _ in snap["chunks"]:
+            self._refs[digest] -= 1
+            if self._refs[digest] <= 0:
+                del self._refs[digest]
+                self._chunk_path(digest).unlink(missing_ok=True)
+                removed += 1
+        if removed:
+            log.debug("snapshot gc removed %d chunks", removed)
+
+    def _load_refs(self):
+        """Count chunk references across every index, and sweep orphaned chunks."""
+        self._refs = Counter()
+        sweep = True
+        for idx in self._targets.glob("*.json"):
+            try:
+                for snap in json.loads(idx.read_text()):
+                    self._refs.update(d for d, _ in snap["chunks"])
+            except (OSError, ValueError):
+                # Can't tell what an unreadable index references — skip the sweep
+                sweep = False
+        if not sweep:
+            return
+        removed = 0
+        for cpath in self._chunks.glob("*/*.z"):
+            if cpath.stem not in self._refs:
+                cpath.unlink(missing_ok=True)
+                removed += 1
+        if removed:
+            log.info("snapshot gc removed %d orphaned chunks", removed)
+
+    def latest(self, name: str) -> tuple[str, bytes] | None:
+        """(hash, content) of the newest snapshot, or None."""
+        index = self._load_index(name)
+        if not index:
+            return None
+        snap = index[-1]
+        try:
+            data = b"".join(
+                zlib.decompress(self._chunk_path(d).read_bytes()) for d, _ in snap["chunks"]
+            )
+        except (OSError, zlib.error) as e:
+            log.warning("snapshot for %s unreadable: %s", name, e)
+            return None
+        return snap["hash"], data
+
+    def stored_bytes(self, name: str) -> int:
+        unique = {d: s for snap in self._load_index(name) for d, s in snap["chunks"]}
+        return sum(unique.values())
@@ -0,0 +1,76 @@
+"""Watcher state store — per-target records persisted as one JSON file.
+
+Each record holds what a target needs to pick up where it left off after a
+restart: content hash, ETag / Last-Modified validators, body size, last
+check / last change times and the current error streak.
+
+The file is read lazily on first use. Updates stay in memory and are
+written back by flush(), which the watcher calls at most once per
+flush_interval: one atomic replace of the whole file, done off the event
+loop, and only when something changed — never one fsync per target.
+"""
+
+import asyncio
+import json
+import logging
+from pathlib import Path
+
+from scout.storage import atomic_write
+
+log = logging.getLogger("scout.watchers.state")
+
+
+class WatcherStateStore:
+    def __init__(self, path: Path | None = None):
+        self.path = Path(path) if path is not None else None
+        self._records: dict[str, dict] | None = None
+        self._dirty = False
+
+    def load(self):
+        """Read the state file. Safe to call more than once."""
+        if self._records is not None:
+            return
+        self._records = {}
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            self._records = json.loads(self.path.read_text())
+            log.info("loaded watcher state for %d targets", len(self._records))
+        except (OSError, ValueError) as e:
+            log.warning("watcher state unreadable — starting fresh: %s", e)
+            self._records = {}
+
+    @property
+    def records(self) -> dict[str, dict]:
+        if self._records is None:
+            self.load()
+        return self._records
+
+    def get(self, name: str) -> dict:
+        return self.records.get(name, {})
+
+    def update(self, name: str, **fields):
+        rec = self.records.setdefault(name, {})
+        for key, value in fields.items():
+            if rec.get(key) != value:
+                rec[key] = value
+                self._dirty = True
+
+    def discard(self, name: str):
+        if self.records.pop(name, None) is not None:
+            self._dirty = True
+
+    def items(self):
+        return self.records.items()
+
+    async def flush(self):
+        if not self._dirty or self.path is None or self._records is None:
+            return
+        # Serialize on the loop so in-flight checks can't mutate mid-dump
+        data = json.dumps(self._records, separators=(",", ":")).encode()
+        self._dirty = False
+        try:
+            await asyncio.to_thread(atomic_write, self.path, data)
+        except OSError as e:
+            self._dirty = True
+            log.warning("failed to save watcher state: %s", e)
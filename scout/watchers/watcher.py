@@ -3,80 +3,427 @@
 import asyncio
 import hashlib
 import logging
+import math
+import random
+import re
+import time
+from collections import deque
+from pathlib import Path
+from urllib.parse import urlsplit
 
 import aiohttp
 
+from scout.http_client import HttpClient
+from scout.watchers.modes import TargetMode
+from scout.watchers.scheduler import TimerHeap
+from scout.watchers.snapshots import SnapshotStore, render_diff
+from scout.watchers.state import WatcherStateStore
+
 log = logging.getLogger("scout.watchers")
 
+CHUNK_SIZE = 64 * 1024
+
+
+def _tail(samples: deque) -> dict:
+    """p95 and max of recent samples (ms)."""
+    if not samples:
+        return {"p95": None, "max": None}
+    ordered = sorted(samples)
+    return {
+        "p95": round(ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)], 1),
+        "max": round(ordered[-1], 1),
+    }
+
+
+async def hash_body(
+    resp: aiohttp.ClientResponse, max_bytes: int, keep: bytearray | None = None
+) -> tuple[str, int, bool]:
+    """Stream the body into SHA-256 without buffering it.
+
+    Returns (hash, bytes hashed, truncated). Reading stops at max_bytes;
+    the unread remainder makes aiohttp drop the connection instead of
+    returning it to the pool. Pass `keep` to also collect the hashed
+    bytes (for a snapshot) — that buffers the body again.
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+        remaining = max_bytes - size
+        if len(chunk) >= remaining:
+            part = chunk[:remaining]
+            hasher.update(part)
+            if keep is not None:
+                keep += part
+            size += remaining
+            # Exactly at the cap is only truncation if more data follows
+            truncated = len(chunk) > remaining or not resp.content.at_eof()
+            return hasher.hexdigest()[:16], size, truncated
+        hasher.update(chunk)
+        if keep is not None:
+            keep += chunk
+        size += len(chunk)
+    return hasher.hexdigest()[:16], size, False
+
+
+async def read_body(resp: aiohttp.ClientResponse, max_bytes: int) -> tuple[bytes, bool]:
+    """Read at most max_bytes of the body. Returns (body, truncated)."""
+    buf = bytearray()
+    async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+        remaining = max_bytes - len(buf)
+        if len(chunk) >= remaining:
+            buf += chunk[:remaining]
+            return bytes(buf), len(chunk) > remaining or not resp.content.at_eof()
+        buf += chunk
+    return bytes(buf), False
+
 
 class WatcherManager:
-    def __init__(self, config: dict, alerter):
+    def __init__(
+        self,
+        config: dict,
+        alerter,
+        http: HttpClient | None = None,
+        state_dir: Path | None = None,
+    ):
         self.interval = config.get("check_interval", 300)
-        self.targets = config.get("targets", [])
+        self.jitter = config.get("jitter", 0.1)
+        self.flush_interval = config.get("flush_interval", 60)
+        self.targets = []
+        # Selectors and strip regexes are compiled once per target here
+        self._modes: dict[str, TargetMode] = {}
+        for target in config.get("targets", []):
+            try:
+                self._modes[target["name"]] = TargetMode(target)
+            except (ValueError, re.error) as e:
+                log.error("watcher [%s] disabled — bad config: %s", target.get("name"), e)
+                continue
+            self.targets.append(target)
+        self._by_name = {t["name"]: t for t in self.targets}
+        self.timeout = config.get("timeout", 15)
+        self.max_bytes = config.get("max_bytes", 1024 * 1024)
+        self.max_concurrency = config.get("max_concurrency", 16)
+        self.per_host_limit = config.get("per_host_limit", 2)
         self.alerter = alerter
-        self._state: dict[str, str] = {}
+        self.http = http or HttpClient()
+
+        # Hash, validators, last check and error streak per target — survives restarts
+        self._store = WatcherStateStore(state_dir / "state.json" if state_dir is not None else None)
+        # Last N versions per target, for diffs in change alerts
+        snap_cfg = config.get("snapshots", {})
+        self._snapshots = None
+        if state_dir is not None and snap_cfg.get("keep", 5) > 0:
+            self._snapshots = SnapshotStore(
+                state_dir / "snapshots",
+                keep=snap_cfg.get("keep", 5),
+                max_bytes=snap_cfg.get("max_bytes", 2 * 1024 * 1024),
+            )
+        self.diff_lines = snap_cfg.get("diff_lines", 20)
+        self._snapshotted: set[str] = set()
+
+        self._not_modified = 0
+        self._bytes_saved = 0
+        self._truncated: set[str] = set()
+
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._latency: dict[str, float] = {}
+        self._schedule = TimerHeap()
+        self._dispatched = 0
+        self._skipped = 0
+        # How late checks start and how long they take — overruns show up here
+        self._lag_ms: deque[float] = deque(maxlen=256)
+        self._check_ms: deque[float] = deque(maxlen=256)
+        # Checks finished per second, [second, count] — bounded by the interval, not the load
+        self._completed: deque[list[int]] = deque()
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "targets": len(self.targets),
+            "in_flight": len(self._inflight),
+            "dispatched": self._dispatched,
+            "skipped": self._skipped,
+            "dispatch_lag_ms": _tail(self._lag_ms),
+            "check_ms": _tail(self._check_ms),
+            "completed_per_interval": self._completed_since(time.monotonic() - self.interval),
+            "latency_ms": {name: round(ms, 1) for name, ms in self._latency.items()},
+            "not_modified": self._not_modified,
+            "bytes_saved": self._bytes_saved,
+            "truncated": sorted(self._truncated),
+            "next_due": self.next_due(5),
+        }
+
+    def target_states(self) -> list[dict]:
+        """Persisted state of every target, for status output."""
+        out = []
+        for target in self.targets:
+            rec = self._store.get(target["name"])
+            out.append({
+                "name": target["name"],
+                "hash": rec.get("hash"),
+                "last_check": rec.get("last_check"),
+                "last_change": rec.get("last_change"),
+                "error_streak": rec.get("error_streak", 0),
+                "truncated": target["name"] in self._truncated,
+            })
+        return out
+
+    def _count_completed(self, now: float):
+        second = int(now)
+        if self._completed and self._completed[-1][0] == second:
+            self._completed[-1][1] += 1
+            return
+        self._completed.append([second, 1])
+        while self._completed[0][0] < second - self.interval:
+            self._completed.popleft()
+
+    def _completed_since(self, since: float) -> int:
+        return sum(count for second, count in self._completed if second >= since)
+
+    def next_due(self, limit: int = 10) -> list[dict]:
+        """Upcoming checks in due order (seconds from now), for debugging."""
+        return self._schedule.queue(limit)
+
+    def _target_interval(self, target: dict) -> float:
+        interval = target.get("interval", self.interval)
+        jitter = target.get("jitter", self.jitter)
+        if jitter:
+            interval *= 1 + random.uniform(-jitter, jitter)
+        return max(1.0, interval)
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).hostname or ""
+        sem = self._host_limits.get(host)
+        if sem is None:
+            sem = self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return sem
 
     async def check_target(self, target: dict) -> bool:
         name = target["name"]
         url = target["url"]
         notify_on = target.get("notify_on", "change")
+        mode = self._modes[name]
+
+        rec = self._store.get(name)
+        prev_hash = rec.get("hash")
+        now = int(time.time())
+
+        headers = {}
+        # A 304 says nothing about the status code, so status_code mode never asks
+        if prev_hash and mode.reads_body:
+            if rec.get("etag"):
+                headers["If-None-Match"] = rec["etag"]
+            if rec.get("last_modified"):
+                headers["If-Modified-Since"] = rec["last_modified"]
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    url, timeout=aiohttp.ClientTimeout(total=15)
-                ) as resp:
-                    body = await resp.text()
-                    current_hash = hashlib.sha256(body.encode()).hexdigest()[:16]
-
-                    prev_hash = self._state.get(name)
-                    self._state[name] = current_hash
-
-                    if prev_hash is None:
-                        log.info("watcher [%s] baseline: %s", name, current_hash)
-                        return False
-
-                    if current_hash != prev_hash:
-                        log.info("watcher [%s] changed: %s → %s", name, prev_hash, current_hash)
-                        if notify_on in ("change", "always"):
-                            await self.alerter.send(
-                                f"Watcher <b>{name}</b> detected a change.\n"
-                                f"URL: {url}\n"
-                                f"Hash: {prev_hash} → {current_hash}",
-                                key=f"watcher:{name}",
-                            )
-                        return True
-
-                    log.debug("watcher [%s] unchanged", name)
-                    if notify_on == "always":
+            async with self.http.get(
+                url,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=target.get("timeout", self.timeout)),
+            ) as resp:
+                if resp.status == 304 and headers:
+                    # Not modified — no body to read or hash
+                    self._not_modified += 1
+                    self._bytes_saved += rec.get("size", 0)
+                    self._store.update(name, last_check=now, error_streak=0)
+                    await self._unchanged(name, notify_on)
+                    return False
+
+                max_bytes = target.get("max_bytes", self.max_bytes)
+                truncated = False
+                snapshot = None
+                # Diffs need the whole body in memory, so streamed targets opt in
+                keep_snapshot = (
+                    self._snapshots is not None and mode.reads_body
+                    and target.get("diff", not mode.streaming)
+                )
+                if not mode.reads_body:
+                    current_hash = mode.status_digest(resp.status)
+                elif mode.streaming:
+                    keep = bytearray() if keep_snapshot else None
+                    current_hash, size, truncated = await hash_body(resp, max_bytes, keep)
+                    if keep is not None:
+                        snapshot = bytes(keep)
+                else:
+                    body, truncated = await read_body(resp, max_bytes)
+                    if truncated and mode.type == "json":
+                        raise ValueError(f"JSON body larger than max_bytes ({max_bytes})")
+                    size = len(body)
+                    if keep_snapshot:
+                        current_hash, snapshot = mode.digest_and_snapshot(body)
+                    else:
+                        current_hash = mode.digest(body)
+                    del body
+                self._set_truncated(name, truncated, max_bytes)
+                fields = {"hash": current_hash, "last_check": now, "error_streak": 0}
+                if mode.reads_body:
+                    fields.update(
+                        etag=resp.headers.get("ETag"),
+                        last_modified=resp.headers.get("Last-Modified"),
+                        size=size,
+                    )
+                if prev_hash is not None and current_hash != prev_hash:
+                    fields["last_change"] = now
+                self._store.update(name, **fields)
+
+                if prev_hash is None:
+                    log.info("watcher [%s] baseline: %s", name, current_hash)
+                    if snapshot is not None:
+                        await self._store_snapshot(name, current_hash, snapshot)
+                    return False
+
+                if current_hash != prev_hash:
+                    log.info("watcher [%s] changed: %s → %s", name, prev_hash, current_hash)
+                    diff = None
+                    if snapshot is not None:
+                        diff = await self._diff(name, snapshot)
+                        await self._store_snapshot(name, current_hash, snapshot)
+                    if notify_on in ("change", "always"):
+                        scope = f" (first {max_bytes} bytes)" if truncated else ""
+                        detail = (
+                            f"Status: {resp.status}" if not mode.reads_body
+                            else f"Hash: {prev_hash} → {current_hash}"
+                        )
+                        if diff:
+                            detail += f"\n<pre>{diff}</pre>"
                         await self.alerter.send(
-                            f"Watcher <b>{name}</b> checked — no change.",
+                            f"Watcher <b>{name}</b> detected a change{scope}.\n"
+                            f"URL: {url}\n"
+                            f"{detail}",
                             key=f"watcher:{name}",
                         )
-                    return False
+                    return True
+
+                if snapshot is not None and name not in self._snapshotted:
+                    # First run with snapshots on — seed the store for the next diff
+                    await self._store_snapshot(name, current_hash, snapshot)
+                await self._unchanged(name, notify_on)
+                return False
 
         except Exception as e:
-            log.warning("watcher [%s] error: %s", name, e)
+            streak = rec.get("error_streak", 0) + 1
+            self._store.update(name, last_check=now, error_streak=streak)
+            log.warning("watcher [%s] error (%d in a row): %s", name, streak, e)
             if notify_on in ("error", "always"):
                 await self.alerter.send(
-                    f"Watcher <b>{name}</b> error: {e}",
+                    f"Watcher <b>{name}</b> error ({streak} in a row): {e}",
                     key=f"watcher:{name}:error",
                 )
             return False
 
+    async def _store_snapshot(self, name: str, content_hash: str, snapshot: bytes):
+        try:
+            await asyncio.to_thread(self._snapshots.put, name, content_hash, snapshot)
+            self._snapshotted.add(name)
+        except OSError as e:
+            log.warning("watcher [%s] snapshot not saved: %s", name, e)
+
+    async def _diff(self, name: str, snapshot: bytes) -> str | None:
+        """Diff against the stored previous version, computed off the event loop."""
+        try:
+            prev = await asyncio.to_thread(self._snapshots.latest, name)
+        except OSError as e:
+            log.warning("watcher [%s] previous snapshot unreadable: %s", name, e)
+            return None
+        if prev is None:
+            return None
+        return await asyncio.to_thread(render_diff, prev[1], snapshot, self.diff_lines)
+
+    async def _unchanged(self, name: str, notify_on: str):
+        log.debug("watcher [%s] unchanged", name)
+        if notify_on == "always":
+            await self.alerter.send(
+                f"Watcher <b>{name}</b> checked — no change.",
+                key=f"watcher:{name}",
+            )
+
+    def _set_truncated(self, name: str, truncated: bool, max_bytes: int):
+        if truncated and name not in self._truncated:
+            log.warning("watcher [%s] body exceeds %d bytes — hashing truncated", name, max_bytes)
+            self._truncated.add(name)
+        elif not truncated:
+            self._truncated.discard(name)
+
+    async def _check_limited(self, target: dict, due: float | None = None) -> bool:
+        # Host slot first: waiting on a busy host must not hold a global slot
+        async with self._host_semaphore(target["url"]), self._semaphore:
+            if due is not None:
+                # Start lag includes time queued for a slot
+                self._lag_ms.append(max(0.0, time.monotonic() - due) * 1000)
+            started = time.perf_counter()
+            try:
+                return await self.check_target(target)
+            finally:
+                elapsed = (time.perf_counter() - started) * 1000
+                self._latency[target["name"]] = elapsed
+                self._check_ms.append(elapsed)
+                self._count_completed(time.monotonic())
+
+    def _dispatch(self, now: float):
+        """Start every due target and reschedule it.
+
+        Targets are rescheduled from their previous due time so intervals
+        don't drift. A target whose last check is still running is skipped
+        for this slot rather than stacked; one that fell more than a full
+        interval behind is re-anchored to now instead of bursting to catch up.
+        """
+        for name, due in self._schedule.pop_due(now):
+            target = self._by_name.get(name)
+            if target is None:
+                continue
+            next_due = due + self._target_interval(target)
+            if next_due <= now:
+                next_due = now + self._target_interval(target)
+            self._schedule.schedule(name, next_due)
+
+            if name in self._inflight:
+                self._skipped += 1
+                log.warning("watcher [%s] still running — skipping this slot", name)
+                continue
+            task = asyncio.create_task(self._check_limited(target, due))
+            self._inflight[name] = task
+            task.add_done_callback(lambda _, n=name: self._inflight.pop(n, None))
+            self._dispatched += 1
+
     async def run(self, stop: asyncio.Event):
         if not self.targets:
             log.info("no watcher targets configured — watcher idle")
             await stop.wait()
             return
 
-        log.info("watcher started — %d targets, checking every %ds", len(self.targets), self.interval)
+        log.info(
+            "watcher started — %d targets, default every %ds (max %d concurrent, %d per host)",
+            len(self.targets), self.interval, self.max_concurrency, self.per_host_limit,
+        )
+        # Read persisted state off the event loop before the first check
+        await asyncio.to_thread(self._store.load)
+
+        # First checks spread over a short window so startup isn't one burst
+        now = time.monotonic()
+        spread = min(30.0, self.interval)
+        for target in self.targets:
+            self._schedule.schedule(target["name"], now + random.uniform(0, spread))
+
+        last_flush = now
         while not stop.is_set():
-            for target in self.targets:
-                await self.check_target(target)
+            now = time.monotonic()
+            self._dispatch(now)
 
+            # State writes are coalesced — at most one per flush_interval
+            if now - last_flush >= self.flush_interval:
+                await self._store.flush()
+                last_flush = now
+
+            next_due = self._schedule.next_due()
+            delay = self.flush_interval if next_due is None else next_due - time.monotonic()
             try:
-                await asyncio.wait_for(stop.wait(), timeout=self.interval)
+                await asyncio.wait_for(stop.wait(), timeout=max(0, min(delay, self.flush_interval)))
                 break
             except asyncio.TimeoutError:
                 pass
+
+        for task in list(self._inflight.values()):
+            task.cancel()
+        await self._store.flush()